@@ -0,0 +1,23 @@
+import datetime
+import uuid
+
+INSERT_SQL = '''INSERT INTO AnswerLog (session_id, user_id, question_id, chosen_option, correct, time_taken, combo, answered_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)'''
+
+
+class AnswerLog:
+    # Answers are kept in memory while a game runs and written with one executemany when it ends
+    def __init__(self, user_id=None, session_id=None):
+        self.session_id = session_id if session_id is not None else uuid.uuid4().hex
+        self.user_id = user_id
+        self.rows = []
+
+    def record(self, question_id, chosen_option, correct, time_taken, combo):
+        answered_at = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.rows.append((self.session_id, self.user_id, question_id, chosen_option, int(correct), time_taken, combo, answered_at))
+
+    def flush(self, writer):
+        if not self.rows:
+            return None
+        rows, self.rows = self.rows, []
+        return writer.submit_many(INSERT_SQL, rows)
@@ -0,0 +1,159 @@
+import datetime
+import hashlib
+import os
+import re
+import secrets
+from concurrent.futures import Future
+
+import database
+import passwords
+
+MIN_LENGTH = 5
+MAX_LENGTH = 20
+USERNAME_PATTERN = re.compile(r"^[a-zA-Z0-9_.]+$")
+# Remember-me logins: the token lives in this file next to the game, only its hash is kept in main.db
+SESSION_FILE = "session.token"
+SESSION_DAYS = 30
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class AuthError(Exception):
+    # The message is shown to the player as it is
+    pass
+
+
+class AuthService:
+    # Registration, login and user lookups with no pygame dependency, the login and register screens only
+    # collect the inputs and show the outcome. Writes go through the DatabaseWriter when one is given
+    def __init__(self, writer=None):
+        self.writer = writer
+
+    def get_user(self, username):
+        # (user_id, hash, salt) or None
+        connection = database.connect_user()
+        cursor = connection.execute("SELECT user_id, hash, salt FROM User WHERE username = ?", (username,))
+        row = cursor.fetchone()
+        connection.close()
+        return row
+
+    def username_exists(self, username):
+        return self.get_user(username) is not None
+
+    def check_registration(self, username, password, confirm_password):
+        if len(username) >= MAX_LENGTH or len(username) < MIN_LENGTH:
+            raise AuthError("Username should be between 5-20 characters.")
+        if len(password) >= MAX_LENGTH or len(password) < MIN_LENGTH:
+            raise AuthError("Password should be between 5-20 characters.")
+        if username.lower() in password.lower():
+            raise AuthError("Password cannot contain the username.")
+        if not USERNAME_PATTERN.match(username):
+            raise AuthError("Username can only contain letters, numbers, underscores, and dots.")
+        if " " in password:
+            raise AuthError("Password cannot contain spaces.")
+        if password != confirm_password:
+            raise AuthError("Password does not match confirm password.")
+        if self.username_exists(username):
+            raise AuthError("Username already exists")
+
+    def register(self, username, password, confirm_password):
+        # Raises AuthError straight away if the details are invalid. Hashing runs on the password thread and
+        # the insert on the writer, the returned future gets the new user_id or whichever of them failed
+        self.check_registration(username, password, confirm_password)
+        time_created = datetime.datetime.now().strftime(TIME_FORMAT)
+        registered = Future()
+
+        def hashed(future):
+            try:
+                self.write(database.add_user, username, *future.result(), time_created,
+                           callback=lambda added: copy_outcome(added, registered))
+            except Exception as error:
+                registered.set_exception(error)
+
+        passwords.hash_password_async(password).add_done_callback(hashed)
+        return registered
+
+    def login(self, username, password):
+        # Returns the user_id or raises AuthError. Slow (it runs the KDF), use login_async from the game
+        user = self.get_user(username)
+        if user is None:
+            raise AuthError("Username does not exist")
+        if len(password) >= MAX_LENGTH or len(password) < MIN_LENGTH:
+            raise AuthError("Password should be between 5-20 characters.")
+        user_id, stored_hash, salt = user
+        matches, new_hash = passwords.verify_and_upgrade(password, stored_hash, salt)
+        if not matches:
+            raise AuthError("Username or Password do not match")
+        if new_hash:
+            self.write(database.update_password, user_id, *new_hash)
+        return user_id
+
+    def login_async(self, username, password):
+        return passwords.executor.submit(self.login, username, password)
+
+    def remember(self, user_id):
+        # Tokens are random, so a fast hash is enough and restoring a session never runs the KDF
+        token = secrets.token_urlsafe(32)
+        now = datetime.datetime.now()
+        expires = now + datetime.timedelta(days=SESSION_DAYS)
+        self.forget()
+        self.write(database.add_session_token, user_id, hash_token(token),
+                   now.strftime(TIME_FORMAT), expires.strftime(TIME_FORMAT))
+        # Readable by the owner only, anyone who can read the token can log in as the player
+        with os.fdopen(os.open(SESSION_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as file:
+            file.write(token)
+
+    def restore_session(self):
+        # (user_id, username) from the saved token, or None. A token that is no longer valid is deleted
+        token = read_token()
+        if token is None:
+            return None
+        connection = database.connect_user()
+        user = database.find_session_user(connection, hash_token(token), datetime.datetime.now().strftime(TIME_FORMAT))
+        connection.close()
+        if user is None:
+            os.remove(SESSION_FILE)
+        return user
+
+    def forget(self):
+        # Revokes the saved token (if there is one) so it can't be used again, even from a copy of the file
+        token = read_token()
+        if token is not None:
+            self.write(database.revoke_session_token, hash_token(token))
+            os.remove(SESSION_FILE)
+
+    def write(self, job, *args, callback=None):
+        if self.writer is not None:
+            return self.writer.submit(job, *args, callback=callback)
+        # No writer (tools and benchmarks), run the job on its own connection and transaction
+        future = Future()
+        connection = database.connect_user()
+        try:
+            with connection:
+                result = job(connection, *args)
+        except Exception as error:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+        connection.close()
+        if callback is not None:
+            future.add_done_callback(callback)
+        return future
+
+
+def copy_outcome(source, target):
+    if source.exception() is None:
+        target.set_result(source.result())
+    else:
+        target.set_exception(source.exception())
+
+
+def hash_token(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def read_token():
+    try:
+        with open(SESSION_FILE) as file:
+            return file.read().strip() or None
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,495 @@
+import multiprocessing
+import os
+import heapq
+import random
+import shutil
+import sys
+import sqlite3
+import tempfile
+import time
+
+import auth
+import database
+import db_writer
+import difficulty
+import leaderboard
+import passwords
+import questions
+import quiz_engine
+import question_generator
+import recently_seen
+import scoring
+import spaced_repetition
+import timer_wheel
+
+GAME_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def make_question_db(path, no_questions, no_topics=1):
+    connection = sqlite3.connect(path)
+    connection.execute('''CREATE TABLE Questions (
+                              question_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                              topic_id INTEGER NOT NULL,
+                              subject_id INTEGER NOT NULL,
+                              "question_text" TEXT NOT NULL,
+                              correct_answer TEXT NOT NULL,
+                              option_1 TEXT NOT NULL,
+                              option_2 TEXT NOT NULL,
+                              option_3 TEXT NOT NULL,
+                              UNIQUE("question_text"))''')
+    with connection:
+        connection.executemany('INSERT INTO Questions (topic_id, subject_id, question_text, correct_answer, option_1, option_2, option_3) VALUES (?, 1, ?, ?, ?, ?, ?)',
+                               ((i % no_topics + 1, f"Synthetic question number {i}?", f"Answer {i}",
+                                 f"Wrong {i}a", f"Wrong {i}b", f"Wrong {i}c") for i in range(no_questions)))
+    return connection
+
+
+def timed(function, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def bench_sampling(sizes=(1000, 100000, 1000000), k=20):
+    print(f"{'questions':>10} {'ORDER BY RANDOM() ms':>22} {'id load ms':>12} {'sample+fetch ms':>16}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            connection = make_question_db(os.path.join(directory, "bench.db"), size)
+            order_by_random = timed(lambda: connection.execute('''SELECT question_text, correct_answer, option_1, option_2, option_3
+                                                                   FROM Questions WHERE topic_id = 1
+                                                                   ORDER BY RANDOM() LIMIT ?''', (k,)).fetchall(), 5)
+            sampler = questions.QuestionSampler()
+            load = timed(lambda: sampler.load_topic(connection, 1), 1)
+            sample = timed(lambda: sampler.sample(connection, 1, k), 200)
+            connection.close()
+        print(f"{size:>10} {order_by_random:>22.3f} {load:>12.3f} {sample:>16.3f}")
+
+
+def bench_question_bank(sizes=(1000, 100000, 1000000), k=20):
+    print(f"{'questions':>10} {'load s':>8} {'memory MB':>10} {'bytes/question':>15} {'sample ms':>10}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            connection = make_question_db(os.path.join(directory, "bench.db"), size, no_topics=10)
+            start = time.perf_counter()
+            bank = questions.QuestionBank.load(connection)
+            load = time.perf_counter() - start
+            connection.close()
+        memory = bank.memory_usage()
+        sample = timed(lambda: bank.sample(1, k), 1000)
+        print(f"{size:>10} {load:>8.2f} {memory / 1e6:>10.1f} {memory // size:>15} {sample:>10.4f}")
+
+
+def split_reader(path, immutable, no_questions, seconds, results):
+    if immutable:
+        connection = sqlite3.connect(f"file:{path}?mode=ro&immutable=1", uri=True)
+        connection.execute(f"PRAGMA mmap_size = {database.MMAP_SIZE}")
+    else:
+        connection = sqlite3.connect(path, timeout=database.BUSY_TIMEOUT)
+    rng = random.Random()
+    queries = 0
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        question_ids = rng.sample(range(1, no_questions + 1), 20)
+        questions.fetch_questions_by_id(connection, question_ids)
+        queries += 1
+    results.put(queries)
+
+
+def split_writer(path, seconds):
+    # Stands in for players saving scores into a shared database file
+    connection = sqlite3.connect(path, timeout=database.BUSY_TIMEOUT)
+    connection.execute("CREATE TABLE IF NOT EXISTS HighScore (user_id INTEGER PRIMARY KEY, high_score INTEGER)")
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        with connection:
+            connection.execute("INSERT OR REPLACE INTO HighScore VALUES (?, ?)", (random.randint(1, 1000), random.randint(1, 10 ** 6)))
+
+
+def bench_split_databases(no_questions=100000, reader_counts=(1, 4, 16), seconds=3):
+    print(f"{'readers':>8} {'shared main.db q/s':>20} {'immutable content.db q/s':>26}")
+    with tempfile.TemporaryDirectory() as directory:
+        shared_path = os.path.join(directory, "shared.db")
+        content_path = os.path.join(directory, "content.db")
+        make_question_db(shared_path, no_questions).close()
+        make_question_db(content_path, no_questions).close()
+        for readers in reader_counts:
+            rates = []
+            for path, immutable in ((shared_path, False), (content_path, True)):
+                results = multiprocessing.Queue()
+                processes = [multiprocessing.Process(target=split_reader, args=(path, immutable, no_questions, seconds, results))
+                             for _ in range(readers)]
+                # In the split layout score writes go to the user database, not the file being read
+                writer_path = shared_path if not immutable else os.path.join(directory, "user.db")
+                processes.append(multiprocessing.Process(target=split_writer, args=(writer_path, seconds)))
+                for process in processes:
+                    process.start()
+                total = sum(results.get() for _ in range(readers))
+                for process in processes:
+                    process.join()
+                rates.append(total / seconds)
+            print(f"{readers:>8} {rates[0]:>20.0f} {rates[1]:>26.0f}")
+
+
+def bench_search(sizes=(10000, 100000, 500000), repeats=20):
+    rng = random.Random(1)
+    vocabulary = [f"term{i:05d}" for i in range(20000)]
+    print(f"{'questions':>10} {'LIKE scan ms':>13} {'FTS5 top 20 ms':>15} {'matches':>8}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            connection = make_question_db(os.path.join(directory, "bench.db"), 0)
+            database.create_question_search(connection)
+            with connection:
+                connection.executemany('INSERT INTO Questions (topic_id, subject_id, question_text, correct_answer, option_1, option_2, option_3) VALUES (1, 1, ?, ?, ?, ?, ?)',
+                                       ((f"{i} " + " ".join(rng.choices(vocabulary, k=12)),) + tuple(" ".join(rng.choices(vocabulary, k=3)) for _ in range(4))
+                                        for i in range(size)))
+            words = rng.choices(vocabulary, k=repeats)
+            word_iterator = iter(words * 2)
+            like = timed(lambda: connection.execute('''SELECT question_id FROM Questions
+                                                        WHERE question_text LIKE ?1 OR correct_answer LIKE ?1 OR option_1 LIKE ?1
+                                                        OR option_2 LIKE ?1 OR option_3 LIKE ?1''',
+                                                     (f"%{next(word_iterator)}%",)).fetchall(), repeats)
+            fts = timed(lambda: questions.search_questions(connection, next(word_iterator)), repeats)
+            matches = len(questions.search_questions(connection, words[0], limit=10 ** 9))
+            connection.close()
+        print(f"{size:>10} {like:>13.2f} {fts:>15.2f} {matches:>8}")
+
+
+def bench_leaderboard(no_users=100000, no_topics=4, repeats=50):
+    rng = random.Random(1)
+    key = (1, 1, 1)
+    with tempfile.TemporaryDirectory() as directory:
+        connection = sqlite3.connect(os.path.join(directory, "bench.db"))
+        connection.executescript('''CREATE TABLE User (user_id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL UNIQUE);
+                                     CREATE TABLE HighScore (high_score_id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL,
+                                         character_id INTEGER NOT NULL, subject_id INTEGER NOT NULL, topic_id INTEGER NOT NULL,
+                                         high_score INTEGER NOT NULL);''')
+        with connection:
+            connection.executemany("INSERT INTO User (user_id, username) VALUES (?, ?)", ((i, f"user{i}") for i in range(1, no_users + 1)))
+            connection.executemany("INSERT INTO HighScore (user_id, character_id, subject_id, topic_id, high_score) VALUES (?, 1, 1, ?, ?)",
+                                   ((user_id, topic_id, rng.randint(0, 20000)) for user_id in range(1, no_users + 1)
+                                    for topic_id in range(1, no_topics + 1)))
+        cache = leaderboard.LeaderboardCache()
+        without_index = timed(lambda: cache.load(connection, key), 5)
+        connection.execute("CREATE INDEX HighScoreLeaderboard ON HighScore (character_id, subject_id, topic_id, high_score DESC, user_id)")
+        plan = connection.execute("EXPLAIN QUERY PLAN SELECT high_score, user_id FROM HighScore WHERE character_id = 1 AND subject_id = 1 AND topic_id = 1 ORDER BY high_score DESC LIMIT 10").fetchall()
+        with_index = timed(lambda: cache.load(connection, key), repeats)
+        cached = timed(lambda: cache.get_top(connection, key), repeats * 100)
+        record = timed(lambda: cache.record(key, rng.randint(1, no_users), "someone", rng.randint(0, 25000)), repeats * 100)
+        connection.close()
+    print(f"{no_users} users x {no_topics} topics")
+    print(f"  query plan: {plan[-1][-1]}")
+    print(f"  ORDER BY without index  {without_index:9.3f} ms")
+    print(f"  covering index          {with_index:9.3f} ms")
+    print(f"  cached top 10           {cached:9.4f} ms")
+    print(f"  incremental update      {record:9.4f} ms")
+
+
+def simulate_frames(work, frames=90, frame_ms=1000 / 60, start_frame=10):
+    # A 60 FPS loop that kicks off work() on one frame, returns the slowest frame and the frames until it finished
+    slowest = 0
+    finished_frame = None
+    pending = None
+    for frame in range(frames):
+        start = time.perf_counter()
+        if frame == start_frame:
+            pending = work()
+        if pending is not None and finished_frame is None and (pending is True or pending.done()):
+            finished_frame = frame - start_frame
+        time.sleep(frame_ms / 1000)
+        slowest = max(slowest, (time.perf_counter() - start) * 1000)
+    return slowest, finished_frame
+
+
+def bench_passwords(repeats=20):
+    salt = os.urandom(16)
+    stored_legacy = passwords.legacy_hash("hunter22", salt)
+    stored_scrypt, _ = passwords.hash_password("hunter22", salt)
+    legacy = timed(lambda: passwords.verify_password("hunter22", stored_legacy, salt), repeats)
+    scrypt = timed(lambda: passwords.verify_password("hunter22", stored_scrypt, salt), repeats)
+    upgrade = timed(lambda: passwords.verify_and_upgrade("hunter22", stored_legacy, salt), repeats)
+    print(f"login check, legacy DJB hash       {legacy:8.3f} ms")
+    print(f"login check, scrypt n=2^{passwords.SCRYPT_N.bit_length() - 1} r={passwords.SCRYPT_R}  {scrypt:8.3f} ms")
+    print(f"legacy check + upgrade to scrypt   {upgrade:8.3f} ms")
+    for label, work in (("legacy hash inline", lambda: passwords.verify_password("hunter22", stored_legacy, salt) and True),
+                        ("scrypt inline", lambda: passwords.verify_password("hunter22", stored_scrypt, salt) and True),
+                        ("scrypt on worker", lambda: passwords.verify_and_upgrade_async("hunter22", stored_scrypt, salt))):
+        slowest, frames = simulate_frames(work)
+        print(f"{label:<20} slowest frame {slowest:7.2f} ms, result after {frames} frames")
+
+
+def old_register_screen(pygame, pygame_gui, button):
+    # Everything RegisterScreen.__init__ (BaseScreen included) loaded before AuthService, the old login built two
+    # of these for every attempt, one to check the username and one to hash the password
+    background = pygame.image.load(os.path.join(GAME_DIR, "Assets/Background.png"))
+    fonts = [pygame.font.Font(os.path.join(GAME_DIR, "Assets/Font1.ttf"), size) for size in (96, 20, 50, 30)]
+    back_button = button.Button(10, 0, pygame.image.load(os.path.join(GAME_DIR, "Assets/back.png")), 0.25)
+    texts = [fonts[0].render("Register", True, "red")]
+    texts += [fonts[2].render(text, True, "red") for text in ("Username:", "Password:", "Confirm Password:")]
+    manager = pygame_gui.UIManager((1280, 720), os.path.join(GAME_DIR, "theme.json"))
+    entries = [pygame_gui.elements.UITextEntryLine(relative_rect=pygame.Rect((10, y), (900, 50)), manager=manager, object_id=object_id)
+               for y, object_id in ((200, "username_entry"), (300, "password_entry"), (400, "confirm_password_entry"))]
+    submit = pygame_gui.elements.UIButton(relative_rect=pygame.Rect((10, 450), (100, 50)), text="Submit", manager=manager)
+    return background, fonts, back_button, texts, manager, entries, submit
+
+
+def bench_login(repeats=20):
+    # Both logins check the same scrypt hash, so the difference is the screens the old one built and its lookups
+    pygame = None
+    if os.path.isdir(os.path.join(GAME_DIR, "Assets")):
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        try:
+            import pygame
+            import pygame_gui
+            import button
+        except ImportError:
+            pygame = None
+    if pygame is None:
+        print("pygame or the game's Assets folder is missing, the screens the old login built are not timed")
+    else:
+        pygame.init()
+        pygame.display.set_mode((1280, 720))
+    old_paths = database.USER_DB_PATH, database.CONTENT_DB_PATH
+    with tempfile.TemporaryDirectory() as directory:
+        database.USER_DB_PATH = os.path.join(directory, "main.db")
+        database.CONTENT_DB_PATH = os.path.join(directory, "content.db")
+        shutil.copy(old_paths[0], database.USER_DB_PATH)
+        database.split_content_database()
+        service = auth.AuthService()
+        password_hash, salt = passwords.hash_password("hunter22")
+        service.write(database.add_user, "benchmark_user", password_hash, salt, "2024-01-01 00:00:00")
+
+        def old_lookup():
+            connection = database.connect()
+            # RegisterScreen.username_exists opened a second connection of its own
+            check = database.connect()
+            check.execute("SELECT 1 FROM User WHERE username = ?", ("benchmark_user",)).fetchone()
+            check.close()
+            row = connection.execute("SELECT user_id, hash, salt FROM User WHERE username = ?",
+                                     ("benchmark_user",)).fetchone()
+            connection.close()
+            return row
+
+        def old_login():
+            old_register_screen(pygame, pygame_gui, button)
+            user_id, stored_hash, salt = old_lookup()
+            old_register_screen(pygame, pygame_gui, button)
+            return passwords.verify_and_upgrade("hunter22", stored_hash, salt)
+
+        before_lookup = timed(old_lookup, repeats * 10)
+        after_lookup = timed(lambda: service.get_user("benchmark_user"), repeats * 10)
+        if pygame is not None:
+            screens = timed(lambda: old_register_screen(pygame, pygame_gui, button), repeats)
+            before = timed(old_login, repeats)
+            after = timed(lambda: service.login("benchmark_user", "hunter22"), repeats)
+        database.USER_DB_PATH, database.CONTENT_DB_PATH = old_paths
+    print(f"user lookup, screens (2 x connect + attach)   {before_lookup:8.3f} ms")
+    print(f"user lookup, AuthService (main.db only)       {after_lookup:8.3f} ms")
+    if pygame is not None:
+        pygame.quit()
+        print(f"one throwaway RegisterScreen                  {screens:8.3f} ms")
+        print(f"whole login, screens (2 x RegisterScreen)     {before:8.3f} ms")
+        print(f"whole login, AuthService                      {after:8.3f} ms")
+
+
+def bench_session(repeats=20):
+    # Time from the start of the login to a ready main menu (user known, high scores loaded) for a returning user
+    old_paths = database.USER_DB_PATH, database.CONTENT_DB_PATH, auth.SESSION_FILE
+    with tempfile.TemporaryDirectory() as directory:
+        database.USER_DB_PATH = os.path.join(directory, "main.db")
+        database.CONTENT_DB_PATH = os.path.join(directory, "content.db")
+        auth.SESSION_FILE = os.path.join(directory, "session.token")
+        shutil.copy(old_paths[0], database.USER_DB_PATH)
+        database.ensure_schema()
+        service = auth.AuthService()
+        password_hash, salt = passwords.hash_password("hunter22")
+        user_id = service.write(database.add_user, "benchmark_user", password_hash, salt, "2024-01-01 00:00:00").result()
+        service.write(database.save_high_score, user_id, 1, 1, 1, 500)
+        service.remember(user_id)
+
+        def load_scores(user_id):
+            connection = database.connect()
+            database.load_high_scores(connection, user_id)
+            connection.close()
+
+        typed = timed(lambda: load_scores(service.login("benchmark_user", "hunter22")), repeats)
+        restored = timed(lambda: load_scores(service.restore_session()[0]), repeats * 10)
+        database.USER_DB_PATH, database.CONTENT_DB_PATH, auth.SESSION_FILE = old_paths
+    print(f"time to ready, typed login (scrypt)     {typed:8.3f} ms")
+    print(f"time to ready, remembered session       {restored:8.3f} ms")
+
+
+def bench_difficulty(sizes=(10000, 100000, 1000000), k=20, repeats=50):
+    print(f"{'questions':>10} {'scan ms':>10} {'bucketed ms':>12} {'update us':>10}")
+    for size in sizes:
+        ratings = [random.gauss(0, 1.5) for _ in range(size)]
+        index = difficulty.TopicIndex()
+        for question_id, rating in enumerate(ratings):
+            index.add(question_id, rating)
+        scan = timed(lambda: heapq.nsmallest(k, range(size), key=lambda question_id: abs(ratings[question_id] - 0.8)), 5)
+        bucketed = timed(lambda: index.nearest(0.8, k), repeats)
+        update = timed(lambda: index.move(random.randrange(size), random.gauss(0, 1.5)), repeats * 100) * 1000
+        print(f"{size:>10} {scan:>10.3f} {bucketed:>12.4f} {update:>10.2f}")
+
+
+def bench_review(sizes=(1000, 100000, 1000000), k=20, repeats=50):
+    print(f"{'scheduled':>10} {'sort ms':>10} {'heap ms':>10} {'answer us':>10}")
+    now = time.time()
+    for size in sizes:
+        scheduler = spaced_repetition.ReviewScheduler()
+        states = {question_id: spaced_repetition.ReviewState(1, spaced_repetition.DAY, 2.5, now + random.uniform(-30, 30) * spaced_repetition.DAY)
+                  for question_id in range(size)}
+        heap = [(state.due_at, question_id) for question_id, state in states.items()]
+        heapq.heapify(heap)
+        scheduler.states[(1, 1)], scheduler.heaps[(1, 1)] = states, heap
+        sort = timed(lambda: [question_id for question_id, state in sorted(states.items(), key=lambda item: item[1].due_at)
+                              if state.due_at <= now][:k], 3)
+        popped = timed(lambda: scheduler.due(1, 1, k, now), repeats)
+        answer = timed(lambda: scheduler.record_answer(1, 1, random.randrange(size), True, 5, 60, now), repeats * 100) * 1000
+        print(f"{size:>10} {sort:>10.3f} {popped:>10.4f} {answer:>10.2f}")
+
+
+def bench_recently_seen(bank_size=1000000, operations=100000):
+    question_ids = [random.randrange(bank_size) for _ in range(operations)]
+    seen = recently_seen.RecentlySeen()
+    add = timed(lambda: [seen.add(question_id) for question_id in question_ids], 1) / operations * 1000
+    check = timed(lambda: [question_id in seen for question_id in question_ids], 1) / operations * 1000
+    full_bitmap = bytearray(bank_size // 8 + 1)
+    print(f"window {seen.window}, question IDs up to {bank_size}")
+    print(f"  add (with eviction)        {add:8.3f} us")
+    print(f"  membership check           {check:8.3f} us")
+    print(f"  memory, windowed bitset    {seen.memory_usage():8d} bytes")
+    print(f"  memory, flat bitmap        {sys.getsizeof(full_bitmap):8d} bytes")
+    print(f"  stored, compressed window  {len(seen.to_blob()):8d} bytes")
+
+
+def bench_rescoring(sizes=(100000, 1000000, 5000000), answers_per_game=20):
+    if scoring.numpy is None:
+        print("numpy is not installed, only the scalar path is timed")
+    print(f"{'answers':>10} {'scalar s':>10} {'vectorised s':>13}")
+    rules = scoring.ScoringRules(combo_bonus=0.1, penalty_share=0.5)
+    for size in sizes:
+        session_ids = [position // answers_per_game for position in range(size)]
+        correct = [random.random() < 0.7 for _ in range(size)]
+        time_taken = [random.uniform(0, 70) for _ in range(size)]
+        scalar = timed(lambda: scoring.rescore_scalar(session_ids, correct, time_taken, rules), 1) / 1000
+        vectorised = float("nan")
+        if scoring.numpy is not None:
+            arrays = scoring.numpy.array(session_ids), scoring.numpy.array(correct), scoring.numpy.array(time_taken)
+            vectorised = timed(lambda: scoring.rescore(*arrays, rules=rules), 3) / 1000
+        print(f"{size:>10} {scalar:>10.2f} {vectorised:>13.3f}")
+
+
+def bench_timers(sizes=(100, 10000, 100000), frames=600, frame_seconds=1 / 60):
+    # Pending timers spread over the next 10 minutes, a frame either polls all of them or advances the wheel
+    print(f"{'timers':>8} {'polling us/frame':>17} {'wheel us/frame':>15} {'wheel us/fire':>14}")
+    for size in sizes:
+        delays = [random.uniform(0, 600) for _ in range(size)]
+        pending = [[delay, False] for delay in delays]
+
+        def poll():
+            now = 0
+            for _ in range(frames):
+                now += frame_seconds
+                for timer in pending:
+                    if not timer[1] and timer[0] <= now:
+                        timer[1] = True
+
+        fired = []
+        wheel = timer_wheel.TimerWheel()
+        for delay in delays:
+            wheel.schedule(delay, fired.append, delay)
+
+        def advance():
+            for _ in range(frames):
+                wheel.advance(frame_seconds)
+
+        polling = timed(poll, 1) / frames * 1000
+        advancing = timed(advance, 1) / frames * 1000
+        # Firing cost, every timer due inside a single frame
+        burst = timer_wheel.TimerWheel()
+        for delay in delays:
+            burst.schedule(delay / 600 * frame_seconds, fired.append, delay)
+        per_fire = timed(lambda: burst.advance(frame_seconds), 1) / size * 1000
+        print(f"{size:>8} {polling:>17.1f} {advancing:>15.2f} {per_fire:>14.3f}")
+
+
+def bench_generator(count=100000):
+    print(f"{'kind':>26} {'questions/s':>12}")
+    for kind in list(question_generator.GENERATORS) + [None]:
+        generator = question_generator.QuestionGenerator(random.Random(1), None if kind is None else [kind])
+        seconds = timed(lambda: generator.generate_many(count), 1) / 1000
+        print(f"{kind or 'mixed':>26} {count / seconds:>12.0f}")
+
+
+def play_sessions(engine, no_sessions, topic_id, mode, bot, character_id=1):
+    answers = 0
+    for _ in range(no_sessions):
+        session = engine.start_session(character_id, topic_id, mode)
+        question = engine.next_question(session)
+        while question is not None:
+            if bot.random() < 0.7:
+                answer = question.correct_answer
+            else:
+                answer = bot.choice([option for option in question.answers if option != question.correct_answer])
+            engine.submit_answer(session, answer, bot.uniform(1, 30))
+            answers += 1
+            question = engine.next_question(session)
+        engine.finish(session)
+    return answers
+
+
+def bench_headless(no_sessions=2000):
+    # Bots playing whole guest games through QuizEngine, no pygame, once keeping everything in memory and once
+    # saving every game through a DatabaseWriter
+    old_paths = database.USER_DB_PATH, database.CONTENT_DB_PATH
+    with tempfile.TemporaryDirectory() as directory:
+        database.USER_DB_PATH = os.path.join(directory, "main.db")
+        database.CONTENT_DB_PATH = os.path.join(directory, "content.db")
+        shutil.copy(old_paths[0], database.USER_DB_PATH)
+        database.ensure_schema()
+        database.dimensions.load()
+        connection = database.connect()
+        bank = questions.QuestionBank.load(connection)
+        connection.close()
+        writer = db_writer.DatabaseWriter()
+        writer.start()
+        print(f"{'engine':>22} {'mode':>8} {'sessions/s':>11} {'answers/s':>10}")
+        for name, engine_writer in (("in memory", None), ("saved (DatabaseWriter)", writer)):
+            for mode in ("classic", "endless", "battle"):
+                engine = quiz_engine.QuizEngine(engine_writer, bank)
+                bot = random.Random(1)
+                start = time.perf_counter()
+                answers = play_sessions(engine, no_sessions, 1, mode, bot)
+                if engine_writer is not None:
+                    writer.flush()
+                seconds = time.perf_counter() - start
+                print(f"{name:>22} {mode:>8} {no_sessions / seconds:>11.0f} {answers / seconds:>10.0f}")
+        writer.close()
+        database.USER_DB_PATH, database.CONTENT_DB_PATH = old_paths
+        database.dimensions.invalidate()
+
+
+BENCHMARKS = {
+    "sampling": bench_sampling,
+    "bank": bench_question_bank,
+    "split": bench_split_databases,
+    "search": bench_search,
+    "leaderboard": bench_leaderboard,
+    "passwords": bench_passwords,
+    "login": bench_login,
+    "session": bench_session,
+    "difficulty": bench_difficulty,
+    "review": bench_review,
+    "seen": bench_recently_seen,
+    "rescoring": bench_rescoring,
+    "timers": bench_timers,
+    "generator": bench_generator,
+    "headless": bench_headless,
+}
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or BENCHMARKS:
+        print(f"== {name} ==")
+        BENCHMARKS[name]()
@@ -0,0 +1,275 @@
+import array
+import contextlib
+import io
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import zlib
+
+import auth
+import database
+import db_writer
+import difficulty
+import passwords
+import question_import
+import questions
+import quiz_engine
+import recently_seen
+import timer_wheel
+
+
+def check_timer_cancel_in_callback():
+    # A callback cancelling a timer that is due in the same tick
+    wheel = timer_wheel.TimerWheel()
+    fired = []
+    second = None
+
+    def cancel_second():
+        fired.append("first")
+        wheel.cancel(second)
+
+    wheel.schedule(0.1, cancel_second)
+    second = wheel.schedule(0.1, fired.append, "second")
+    wheel.advance(0.2)
+    assert fired == ["first"], fired
+    assert len(wheel) == 0, len(wheel)
+    wheel.schedule(0.1, fired.append, "later")
+    wheel.advance(0.2)
+    assert fired == ["first", "later"], fired
+
+
+def check_timer_clear_in_callback():
+    # clear() from a callback stops the rest of the tick, repeating timers included, and leaves the wheel usable
+    wheel = timer_wheel.TimerWheel()
+    fired = []
+    repeating = wheel.schedule_repeating(0.1, fired.append, "repeating")
+    wheel.schedule(0.1, wheel.clear)
+    wheel.schedule(0.1, fired.append, "same tick")
+    wheel.schedule(5, fired.append, "later")
+    wheel.advance(0.2)
+    assert "same tick" not in fired, fired
+    wheel.advance(10)
+    assert fired.count("repeating") <= 1 and "later" not in fired, fired
+    assert len(wheel) == 0 and repeating.callback is None, len(wheel)
+    wheel.schedule(0.1, fired.append, "after clear")
+    wheel.advance(0.2)
+    assert fired[-1] == "after clear" and len(wheel) == 0, fired
+
+
+def save_scores(path, key, scores):
+    # A plain connection, lock waits would otherwise be reported as slow queries
+    connection = sqlite3.connect(path, timeout=database.BUSY_TIMEOUT)
+    for score in scores:
+        with connection:
+            database.save_high_score(connection, *key, score)
+    connection.close()
+
+
+def check_concurrent_high_scores(no_writers=8, saves_per_writer=300):
+    # Several processes saving high scores for the same player and game at once must leave exactly one row,
+    # holding the best score any of them saved
+    key = (999999, 1, 1, 1)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "main.db")
+        shutil.copy(database.USER_DB_PATH, path)
+        # The unique key the upsert relies on is added by ensure_schema, as it is when the game starts
+        old_paths = database.USER_DB_PATH, database.CONTENT_DB_PATH
+        database.USER_DB_PATH, database.CONTENT_DB_PATH = path, os.path.join(directory, "content.db")
+        database.ensure_schema()
+        database.USER_DB_PATH, database.CONTENT_DB_PATH = old_paths
+        score_lists = [[random.randrange(100000) for _ in range(saves_per_writer)] for _ in range(no_writers)]
+        writers = [multiprocessing.Process(target=save_scores, args=(path, key, scores)) for scores in score_lists]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+        assert all(writer.exitcode == 0 for writer in writers), [writer.exitcode for writer in writers]
+        connection = sqlite3.connect(path)
+        rows = connection.execute('''SELECT high_score FROM HighScore
+                                     WHERE user_id = ? AND character_id = ? AND subject_id = ? AND topic_id = ?''',
+                                  key).fetchall()
+        connection.close()
+    best = max(max(scores) for scores in score_lists)
+    assert rows == [(best,)], (rows, best)
+
+
+def rated_attempts(path):
+    connection = sqlite3.connect(path)
+    attempts = connection.execute("SELECT COALESCE(SUM(attempts), 0) FROM QuestionRating").fetchone()[0]
+    connection.close()
+    return attempts
+
+
+@contextlib.contextmanager
+def temp_databases():
+    # A migrated copy of main.db, with its own content.db, in place of the real ones until the block ends
+    old_paths = database.USER_DB_PATH, database.CONTENT_DB_PATH
+    with tempfile.TemporaryDirectory() as directory:
+        database.USER_DB_PATH = os.path.join(directory, "main.db")
+        database.CONTENT_DB_PATH = os.path.join(directory, "content.db")
+        shutil.copy(old_paths[0], database.USER_DB_PATH)
+        try:
+            database.ensure_schema()
+            database.dimensions.load()
+            yield directory
+        finally:
+            database.USER_DB_PATH, database.CONTENT_DB_PATH = old_paths
+            database.dimensions.invalidate()
+            questions.sampler.invalidate()
+            difficulty.engine.invalidate()
+
+
+def check_unsaved_answers_stay_unsaved(no_sessions=20):
+    # Bot games through an engine with no writer must not reach the ratings the next saved game writes
+    with temp_databases():
+        connection = database.connect()
+        bank = questions.QuestionBank.load(connection)
+        connection.close()
+        before = rated_attempts(database.USER_DB_PATH)
+        unsaved = quiz_engine.QuizEngine(None, bank, generated=False)
+        bot = random.Random(1)
+        for _ in range(no_sessions):
+            session = unsaved.start_session(1, 1)
+            question = unsaved.next_question(session)
+            while question is not None:
+                unsaved.submit_answer(session, question.correct_answer, bot.uniform(1, 30))
+                question = unsaved.next_question(session)
+            unsaved.finish(session)
+        writer = db_writer.DatabaseWriter()
+        writer.start()
+        saved = quiz_engine.QuizEngine(writer, bank, generated=False)
+        session = saved.start_session(1, 1)
+        saved.submit_answer(session, saved.next_question(session).correct_answer, 5)
+        saved.finish(session)
+        writer.close()
+        after = rated_attempts(database.USER_DB_PATH)
+    assert after - before == 1, (before, after)
+
+
+def check_seed_replays_questions(seed=12345):
+    # Answering changes the ratings the next game would be picked by, a replayed seed must not notice
+    games = []
+    with temp_databases():
+        engine = quiz_engine.QuizEngine()
+        for _ in range(2):
+            session = engine.start_session(1, 1, seed=seed)
+            texts = []
+            question = engine.next_question(session)
+            while question is not None:
+                texts.append((question.question_text, tuple(question.answers)))
+                engine.submit_answer(session, "", 30)
+                question = engine.next_question(session)
+            engine.finish(session)
+            games.append(texts)
+    assert games[0] == games[1], games
+
+
+def check_answers_load_nothing():
+    # Recording an answer never loads a topic, a game loads what its answers need when it starts
+    ratings = difficulty.DifficultyEngine()
+    assert ratings.record_answer(None, 1, None, True, 5, 60) is None
+    assert ratings.record_answer(None, 1, 10 ** 9, True, 5, 60) is None
+    assert not ratings.topics and not ratings.user_ratings, ratings.topics
+    with temp_databases():
+        engine = quiz_engine.QuizEngine(adaptive=False, generated=False)
+        session = engine.start_session(1, 1, "daily")
+        question = engine.next_question(session)
+        engine.submit_answer(session, question.correct_answer, 5)
+    assert question.question_id in engine.ratings.question_changes, engine.ratings.question_changes
+
+
+def check_register_outcome():
+    # register's future gets the new user_id, or the error if hashing fails, never nothing at all
+    with temp_databases():
+        service = auth.AuthService()
+        user_id = service.register("checkuser", "secret1", "secret1").result(timeout=60)
+        assert service.get_user("checkuser")[0] == user_id, user_id
+        hash_password = passwords.hash_password
+        passwords.hash_password = lambda password: 1 / 0
+        try:
+            future = service.register("checkuser2", "secret1", "secret1")
+            assert isinstance(future.exception(timeout=60), ZeroDivisionError), future.exception()
+        finally:
+            passwords.hash_password = hash_password
+        assert service.get_user("checkuser2") is None
+
+
+def check_refills_reuse_connection(no_questions=100):
+    # Without a question bank, refills sample IDs from memory and fetch on the loader's one connection
+    with temp_databases():
+        engine = quiz_engine.QuizEngine(adaptive=False, generated=False)
+        session = engine.start_session(1, 1, no_questions=no_questions)
+        connect = database.connect
+        opened = []
+        database.connect = lambda: opened.append(1) or connect()
+        try:
+            question = engine.next_question(session)
+            while question is not None:
+                engine.submit_answer(session, question.correct_answer, 5)
+                question = engine.next_question(session)
+        finally:
+            database.connect = connect
+        engine.finish(session)
+        quiz_engine.question_loader.submit(lambda: None).result()
+    assert session.question_number == no_questions, session.question_number
+    assert not opened and session.question_manager.connection is None, opened
+
+
+def check_import_truncated_row():
+    # A short CSV row is one rejected row, the rows around it are still imported. INSERT OR IGNORE would skip it
+    # as a duplicate and the --update upsert would abort the import on the NOT NULL columns
+    with temp_databases():
+        topic = database.dimensions.get_name("Topic", 1)
+        connection = database.connect_content()
+        for update in (False, True):
+            pack = io.StringIO(",".join(question_import.FIELDS) + "\n"
+                               f"{topic},,Check question one {update}?,A,B,C,D\n"
+                               f"{topic},,Check question two {update}?,A,B\n"
+                               f"{topic},,Check question three {update}?,A,B,C,D\n")
+            stats = question_import.import_questions(connection, question_import.read_csv(pack), update=update)
+            assert (stats.read, stats.inserted, stats.duplicates, stats.rejected) == (3, 2, 0, 1), stats.summary()
+        count = connection.execute("SELECT COUNT(*) FROM Questions WHERE question_text LIKE 'Check question %'").fetchone()[0]
+        connection.close()
+    assert count == 4, count
+
+
+def check_seen_window_order(window=50):
+    # A reloaded window drops its oldest questions first, as the one that was saved would have
+    seen = recently_seen.RecentlySeen(window)
+    question_ids = random.Random(1).sample(range(100000), window + 20)
+    for question_id in question_ids:
+        seen.add(question_id)
+    reloaded = recently_seen.RecentlySeen.from_blob(seen.to_blob(), window)
+    for question_id in random.Random(2).sample(range(100000, 200000), window):
+        oldest = question_ids[-window:][0]
+        assert oldest in reloaded, oldest
+        reloaded.add(question_id)
+        assert oldest not in reloaded, oldest
+        question_ids.append(question_id)
+    # Blobs saved as a bitmap before the order was kept still load
+    pairs = array.array("Q", [3, 0b101])
+    legacy = recently_seen.RecentlySeen.from_blob(zlib.compress(pairs.tobytes()), window)
+    assert 3 * 64 in legacy and 3 * 64 + 2 in legacy and len(legacy) == 2, len(legacy)
+
+
+CHECKS = {
+    "timer_cancel": check_timer_cancel_in_callback,
+    "timer_clear": check_timer_clear_in_callback,
+    "high_scores": check_concurrent_high_scores,
+    "unsaved_answers": check_unsaved_answers_stay_unsaved,
+    "replay": check_seed_replays_questions,
+    "answer_loading": check_answers_load_nothing,
+    "register": check_register_outcome,
+    "refills": check_refills_reuse_connection,
+    "import_short_row": check_import_truncated_row,
+    "seen_order": check_seen_window_order,
+}
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or CHECKS:
+        CHECKS[name]()
+        print(f"{name}: ok")
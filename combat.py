@@ -0,0 +1,95 @@
+import random
+import sqlite3
+
+import database
+
+# name: (health, damage dealt to the player on a wrong answer)
+ENEMY_STATS = {
+    "motobug": (60, 10),
+    "crabmeat": (80, 15),
+    "buzz_bomber": (100, 20),
+    "eggman": (150, 25),
+}
+BASE_DAMAGE = 30
+COMBO_DAMAGE = 5
+MAX_DAMAGE = 60
+
+UPSERT_KILLS_SQL = '''INSERT INTO EnemiesKilled (enemy_id, character_id, user_id, amount)
+                      VALUES (?, ?, ?, ?)
+                      ON CONFLICT (user_id, enemy_id, character_id) DO UPDATE SET amount = amount + excluded.amount'''
+
+
+def ensure_enemies():
+    # Enemies is content, so it is filled in before anything opens content.db read-only
+    connection = database.connect_content()
+    try:
+        with connection:
+            connection.executemany("INSERT OR IGNORE INTO Enemies (enemy_name) VALUES (?)", ((name,) for name in ENEMY_STATS))
+    except sqlite3.OperationalError:
+        pass
+    connection.close()
+    database.dimensions.invalidate()
+
+
+class Enemy:
+    def __init__(self, name, enemy_id):
+        self.name = name
+        self.enemy_id = enemy_id
+        self.max_health, self.attack = ENEMY_STATS[name]
+        self.health = self.max_health
+
+    def take_damage(self, amount):
+        self.health = max(0, self.health - amount)
+        return self.health == 0
+
+
+class KillCounter:
+    # Kills pile up in memory during a battle and are saved with one upsert when it ends
+    def __init__(self):
+        self.kills = {}
+
+    def add(self, enemy_id, character_id):
+        key = (enemy_id, character_id)
+        self.kills[key] = self.kills.get(key, 0) + 1
+
+    def total(self):
+        return sum(self.kills.values())
+
+    def flush(self, writer, user_id):
+        if not self.kills:
+            return None
+        rows = [(enemy_id, character_id, user_id, amount) for (enemy_id, character_id), amount in self.kills.items()]
+        self.kills = {}
+        return writer.submit_many(UPSERT_KILLS_SQL, rows)
+
+
+class Battle:
+    def __init__(self, character_id, rng=random):
+        self.character_id = character_id
+        self.rng = rng
+        self.kill_counter = KillCounter()
+        self.enemies_defeated = 0
+        self.enemy = None
+        self.spawn_enemy()
+
+    def spawn_enemy(self):
+        enemy_ids = database.dimensions.table_ids("Enemies")
+        name = self.rng.choice(list(ENEMY_STATS))
+        self.enemy = Enemy(name, enemy_ids.get(name))
+        return self.enemy
+
+    def damage_for_combo(self, combo):
+        return min(MAX_DAMAGE, BASE_DAMAGE + COMBO_DAMAGE * combo)
+
+    def answer(self, correct, player_instance):
+        # Returns True when the enemy on screen was defeated by this answer
+        if not correct:
+            player_instance.health = max(0, player_instance.health - self.enemy.attack)
+            return False
+        if not self.enemy.take_damage(self.damage_for_combo(player_instance.combo)):
+            return False
+        self.enemies_defeated += 1
+        if self.enemy.enemy_id is not None:
+            self.kill_counter.add(self.enemy.enemy_id, self.character_id)
+        self.spawn_enemy()
+        return True
@@ -0,0 +1,306 @@
+import os
+import sqlite3
+
+from query_stats import InstrumentedConnection
+
+# Static content (questions, topics, characters...) lives in its own file so it can be opened read-only
+# and shared between many copies of the game, user data stays in main.db
+CONTENT_DB_PATH = "content.db"
+USER_DB_PATH = "main.db"
+CONTENT_TABLES = ("Subject", "Topic", "Characters", "Enemies", "Questions")
+BUSY_TIMEOUT = 30
+MMAP_SIZE = 256 * 1024 * 1024
+
+
+def connect():
+    # Content is the main schema and user data is attached as "user", so queries can keep using plain table names
+    connection = sqlite3.connect(f"file:{CONTENT_DB_PATH}?mode=ro&immutable=1", uri=True, timeout=BUSY_TIMEOUT,
+                                 factory=InstrumentedConnection)
+    connection.execute(f"PRAGMA main.mmap_size = {MMAP_SIZE}")
+    connection.execute("ATTACH DATABASE ? AS user", (f"file:{USER_DB_PATH}?mode=rw",))
+    return connection
+
+
+def connect_user():
+    return sqlite3.connect(USER_DB_PATH, timeout=BUSY_TIMEOUT, factory=InstrumentedConnection)
+
+
+def connect_content():
+    # Writable connection for tools that change content, the game must not be running while it is used
+    return sqlite3.connect(CONTENT_DB_PATH, timeout=BUSY_TIMEOUT, factory=InstrumentedConnection)
+
+
+def split_content_database():
+    # One-off migration: copy the content tables out of main.db. The old copies are left where they are,
+    # they are shadowed by content.db on every connection made through connect()
+    temp_path = CONTENT_DB_PATH + ".tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+    connection = sqlite3.connect(temp_path)
+    connection.execute("ATTACH DATABASE ? AS old", (USER_DB_PATH,))
+    with connection:
+        for table in CONTENT_TABLES:
+            cursor = connection.execute("SELECT sql FROM old.sqlite_master WHERE type = 'table' AND name = ?", (table,))
+            connection.execute(cursor.fetchone()[0])
+            connection.execute(f'INSERT INTO main."{table}" SELECT * FROM old."{table}"')
+    connection.execute("DETACH DATABASE old")
+    connection.close()
+    os.replace(temp_path, CONTENT_DB_PATH)
+
+
+def create_question_search(connection):
+    # External content FTS5 index over Questions, the triggers keep it in step with every insert, update and delete
+    with connection:
+        connection.executescript('''
+            CREATE VIRTUAL TABLE QuestionSearch USING fts5(
+                question_text, correct_answer, option_1, option_2, option_3,
+                content='Questions', content_rowid='question_id', tokenize='porter unicode61');
+            CREATE TRIGGER QuestionSearchInsert AFTER INSERT ON Questions BEGIN
+                INSERT INTO QuestionSearch (rowid, question_text, correct_answer, option_1, option_2, option_3)
+                VALUES (new.question_id, new.question_text, new.correct_answer, new.option_1, new.option_2, new.option_3);
+            END;
+            CREATE TRIGGER QuestionSearchDelete AFTER DELETE ON Questions BEGIN
+                INSERT INTO QuestionSearch (QuestionSearch, rowid, question_text, correct_answer, option_1, option_2, option_3)
+                VALUES ('delete', old.question_id, old.question_text, old.correct_answer, old.option_1, old.option_2, old.option_3);
+            END;
+            CREATE TRIGGER QuestionSearchUpdate AFTER UPDATE ON Questions BEGIN
+                INSERT INTO QuestionSearch (QuestionSearch, rowid, question_text, correct_answer, option_1, option_2, option_3)
+                VALUES ('delete', old.question_id, old.question_text, old.correct_answer, old.option_1, old.option_2, old.option_3);
+                INSERT INTO QuestionSearch (rowid, question_text, correct_answer, option_1, option_2, option_3)
+                VALUES (new.question_id, new.question_text, new.correct_answer, new.option_1, new.option_2, new.option_3);
+            END;
+            INSERT INTO QuestionSearch (QuestionSearch) VALUES ('rebuild');
+        ''')
+
+
+def ensure_schema():
+    if not os.path.exists(CONTENT_DB_PATH):
+        split_content_database()
+    connection = connect_content()
+    cursor = connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'QuestionSearch'")
+    if cursor.fetchone() is None:
+        try:
+            create_question_search(connection)
+        except sqlite3.OperationalError:
+            # content.db may be on a read-only share, the game still runs without search
+            pass
+    connection.close()
+    connection = connect_user()
+    cursor = connection.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'HighScoreKey'")
+    if cursor.fetchone() is None:
+        with connection:
+            # Older databases could hold several rows for the same combination, keep the best one
+            cursor.execute('''DELETE FROM HighScore
+                              WHERE EXISTS (SELECT 1 FROM HighScore AS other
+                                            WHERE other.user_id = HighScore.user_id
+                                            AND other.character_id = HighScore.character_id
+                                            AND other.subject_id = HighScore.subject_id
+                                            AND other.topic_id = HighScore.topic_id
+                                            AND (other.high_score > HighScore.high_score
+                                                 OR (other.high_score = HighScore.high_score
+                                                     AND other.high_score_id < HighScore.high_score_id)))''')
+            cursor.execute('''CREATE UNIQUE INDEX HighScoreKey
+                              ON HighScore (user_id, character_id, subject_id, topic_id)''')
+    with connection:
+        cursor.execute('''CREATE TABLE IF NOT EXISTS AnswerLog (
+                              answer_log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                              session_id TEXT NOT NULL,
+                              user_id INTEGER,
+                              question_id INTEGER,
+                              chosen_option TEXT NOT NULL,
+                              correct INTEGER NOT NULL,
+                              time_taken REAL NOT NULL,
+                              combo INTEGER NOT NULL,
+                              answered_at TIMESTAMP NOT NULL,
+                              FOREIGN KEY(user_id) REFERENCES User(user_id)
+                          )''')
+        # Remember-me logins, only a hash of each token is stored so a copy of main.db can't be used to log in
+        cursor.execute('''CREATE TABLE IF NOT EXISTS SessionToken (
+                              session_token_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                              user_id INTEGER NOT NULL,
+                              token_hash TEXT NOT NULL UNIQUE,
+                              created_at TIMESTAMP NOT NULL,
+                              expires_at TIMESTAMP NOT NULL,
+                              revoked INTEGER NOT NULL DEFAULT 0,
+                              FOREIGN KEY(user_id) REFERENCES User(user_id)
+                          )''')
+        # Difficulty ratings change with every answer, so they live here rather than in content.db
+        cursor.execute('''CREATE TABLE IF NOT EXISTS QuestionRating (
+                              question_id INTEGER PRIMARY KEY,
+                              rating REAL NOT NULL,
+                              attempts INTEGER NOT NULL
+                          )''')
+        cursor.execute('''CREATE TABLE IF NOT EXISTS UserTopicRating (
+                              user_id INTEGER NOT NULL,
+                              topic_id INTEGER NOT NULL,
+                              rating REAL NOT NULL,
+                              attempts INTEGER NOT NULL,
+                              PRIMARY KEY (user_id, topic_id),
+                              FOREIGN KEY(user_id) REFERENCES User(user_id)
+                          )''')
+        # Spaced repetition: when each user should next see each question they have answered, due_at is a Unix time
+        cursor.execute('''CREATE TABLE IF NOT EXISTS ReviewSchedule (
+                              user_id INTEGER NOT NULL,
+                              question_id INTEGER NOT NULL,
+                              repetitions INTEGER NOT NULL,
+                              interval REAL NOT NULL,
+                              ease REAL NOT NULL,
+                              due_at REAL NOT NULL,
+                              PRIMARY KEY (user_id, question_id),
+                              FOREIGN KEY(user_id) REFERENCES User(user_id)
+                          )''')
+        # The questions each user saw most recently, oldest first and compressed (see recently_seen.py)
+        cursor.execute('''CREATE TABLE IF NOT EXISTS SeenQuestions (
+                              user_id INTEGER PRIMARY KEY,
+                              seen BLOB NOT NULL,
+                              FOREIGN KEY(user_id) REFERENCES User(user_id)
+                          )''')
+        # One row per finished game. The seed replays its stage and enemies, and for daily games and games started
+        # from a seed its questions and answer order too. Other games also picked questions by the player's ratings,
+        # reviews and recently seen questions at the time, which the seed can't bring back
+        cursor.execute('''CREATE TABLE IF NOT EXISTS GameSession (
+                              session_id TEXT PRIMARY KEY,
+                              user_id INTEGER,
+                              seed INTEGER NOT NULL,
+                              mode TEXT NOT NULL,
+                              character_id INTEGER NOT NULL,
+                              subject_id INTEGER NOT NULL,
+                              topic_id INTEGER NOT NULL,
+                              score INTEGER NOT NULL,
+                              started_at TIMESTAMP NOT NULL,
+                              FOREIGN KEY(user_id) REFERENCES User(user_id)
+                          )''')
+        cursor.execute('''CREATE UNIQUE INDEX IF NOT EXISTS EnemiesKilledKey
+                          ON EnemiesKilled (user_id, enemy_id, character_id)''')
+        # Covers the leaderboard query: the top N of a topic is read straight off the index in score order
+        cursor.execute('''CREATE INDEX IF NOT EXISTS HighScoreLeaderboard
+                          ON HighScore (character_id, subject_id, topic_id, high_score DESC, user_id)''')
+    connection.close()
+
+
+def save_high_score(connection, user_id, character_id, subject_id, topic_id, score):
+    # A single statement, so a concurrent writer can never lower a score or add a duplicate row.
+    # Like the other write helpers it leaves committing to the caller (normally the DatabaseWriter batch)
+    connection.execute('''INSERT INTO HighScore (user_id, character_id, subject_id, topic_id, high_score)
+                          VALUES (?, ?, ?, ?, ?)
+                          ON CONFLICT (user_id, character_id, subject_id, topic_id)
+                          DO UPDATE SET high_score = max(high_score, excluded.high_score)''',
+                       (user_id, character_id, subject_id, topic_id, score))
+
+
+def load_high_scores(connection, user_id):
+    # Every high score the user has, keyed by (character_id, subject_id, topic_id)
+    cursor = connection.execute('''SELECT character_id, subject_id, topic_id, MAX(high_score)
+                                   FROM HighScore
+                                   WHERE user_id = ?
+                                   GROUP BY character_id, subject_id, topic_id''', (user_id,))
+    return {(character_id, subject_id, topic_id): high_score
+            for character_id, subject_id, topic_id, high_score in cursor.fetchall()}
+
+
+def add_game_session(connection, session_id, user_id, seed, mode, character_id, subject_id, topic_id, score, started_at):
+    connection.execute('''INSERT INTO GameSession (session_id, user_id, seed, mode, character_id, subject_id, topic_id, score, started_at)
+                          VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                       (session_id, user_id, seed, mode, character_id, subject_id, topic_id, score, started_at))
+
+
+def update_password(connection, user_id, password_hash, salt):
+    connection.execute("UPDATE User SET hash = ?, salt = ? WHERE user_id = ?", (password_hash, salt, user_id))
+
+
+def add_session_token(connection, user_id, token_hash, created_at, expires_at):
+    # Dead tokens are cleared out whenever the user starts a new session
+    connection.execute("DELETE FROM SessionToken WHERE user_id = ? AND (expires_at <= ? OR revoked = 1)",
+                       (user_id, created_at))
+    connection.execute('''INSERT INTO SessionToken (user_id, token_hash, created_at, expires_at)
+                          VALUES (?, ?, ?, ?)''', (user_id, token_hash, created_at, expires_at))
+
+
+def revoke_session_token(connection, token_hash):
+    connection.execute("UPDATE SessionToken SET revoked = 1 WHERE token_hash = ?", (token_hash,))
+
+
+def find_session_user(connection, token_hash, now):
+    # (user_id, username) for a live token, None if it is unknown, revoked or expired
+    cursor = connection.execute('''SELECT User.user_id, User.username
+                                   FROM SessionToken JOIN User ON User.user_id = SessionToken.user_id
+                                   WHERE token_hash = ? AND revoked = 0 AND expires_at > ?''', (token_hash, now))
+    return cursor.fetchone()
+
+
+def add_user(connection, username, password_hash, salt, time_created):
+    cursor = connection.execute('''INSERT INTO User(username, hash, salt, time_created)
+                                   VALUES (?, ?, ?, ?)''', (username, password_hash, salt, time_created))
+    return cursor.lastrowid
+
+
+class NameCache:
+    # Maps names to IDs (and back) for the small content tables so lookups never touch the database
+    TABLES = {
+        "Characters": ("character_id", "character_name"),
+        "Subject": ("subject_id", "subject_name"),
+        "Topic": ("topic_id", "topic_text"),
+        "Enemies": ("enemy_id", "enemy_name"),
+    }
+
+    def __init__(self):
+        self.ids = None
+        self.names = None
+        self.topic_subjects = None
+
+    def load(self, connection=None):
+        own_connection = connection is None
+        if own_connection:
+            connection = connect()
+        cursor = connection.cursor()
+        cursor.execute('''SELECT 'Characters', character_id, character_name, NULL FROM Characters
+                          UNION ALL SELECT 'Subject', subject_id, subject_name, NULL FROM Subject
+                          UNION ALL SELECT 'Topic', topic_id, topic_text, subject_id FROM Topic
+                          UNION ALL SELECT 'Enemies', enemy_id, enemy_name, NULL FROM Enemies''')
+        ids = {table: {} for table in self.TABLES}
+        names = {table: {} for table in self.TABLES}
+        topic_subjects = {}
+        for table, row_id, name, subject_id in cursor.fetchall():
+            ids[table][name] = row_id
+            names[table][row_id] = name
+            if table == "Topic":
+                topic_subjects[row_id] = subject_id
+        if own_connection:
+            connection.close()
+        self.ids, self.names, self.topic_subjects = ids, names, topic_subjects
+
+    def invalidate(self):
+        # Must be called after anything writes to Characters, Subject, Topic or Enemies
+        self.ids = None
+        self.names = None
+        self.topic_subjects = None
+
+    def get_id(self, table, name):
+        if self.ids is None:
+            self.load()
+        return self.ids[table][name]
+
+    def table_ids(self, table):
+        if self.ids is None:
+            self.load()
+        return self.ids[table]
+
+    def get_name(self, table, row_id):
+        if self.names is None:
+            self.load()
+        return self.names[table][row_id]
+
+    def topics_for_subject(self, subject_id):
+        if self.topic_subjects is None:
+            self.load()
+        return [self.names["Topic"][topic_id] for topic_id, parent_id in self.topic_subjects.items()
+                if parent_id == subject_id]
+
+    def subject_for_topic(self, topic_id):
+        if self.topic_subjects is None:
+            self.load()
+        return self.topic_subjects[topic_id]
+
+
+dimensions = NameCache()
@@ -0,0 +1,94 @@
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+import database
+
+STOP = object()
+
+
+class DatabaseWriter(threading.Thread):
+    # Owns the only writing connection. Jobs queued by the screens are run in batches, one transaction per batch,
+    # so the frame loop never waits for a commit to reach the disk
+    def __init__(self, max_batch=200):
+        super().__init__(name="DatabaseWriter", daemon=True)
+        self.jobs = queue.Queue()
+        self.max_batch = max_batch
+        self.connection = None
+
+    def submit(self, job, *args, callback=None):
+        # job(connection, *args) must not commit itself, its return value becomes the future's result
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+        self.jobs.put((future, job, args))
+        return future
+
+    def submit_many(self, sql, rows, callback=None):
+        return self.submit(execute_many, sql, rows, callback=callback)
+
+    def flush(self, timeout=None):
+        # Everything queued before this call has been committed once it returns
+        return self.submit(lambda connection: None).result(timeout)
+
+    def close(self, timeout=None):
+        if self.is_alive():
+            self.jobs.put(STOP)
+            self.join(timeout)
+
+    def run(self):
+        self.connection = database.connect()
+        self.connection.isolation_level = None
+        running = True
+        while running:
+            batch = [self.jobs.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.jobs.get_nowait())
+                except queue.Empty:
+                    break
+            if STOP in batch:
+                running = False
+                batch = [job for job in batch if job is not STOP]
+            if batch:
+                self.run_batch(batch)
+        self.connection.close()
+
+    def run_batch(self, batch):
+        outcomes = []
+        try:
+            self.connection.execute("BEGIN IMMEDIATE")
+            for future, job, args in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                # A savepoint per job means one failing write doesn't throw away the rest of the batch
+                self.connection.execute("SAVEPOINT job")
+                try:
+                    result = job(self.connection, *args)
+                except Exception as error:
+                    self.connection.execute("ROLLBACK TO job")
+                    self.connection.execute("RELEASE job")
+                    outcomes.append((future, None, error))
+                else:
+                    self.connection.execute("RELEASE job")
+                    outcomes.append((future, result, None))
+            self.connection.execute("COMMIT")
+        except sqlite3.Error as error:
+            if self.connection.in_transaction:
+                self.connection.execute("ROLLBACK")
+            for future, job, args in batch:
+                if not future.done():
+                    if not future.running():
+                        future.set_running_or_notify_cancel()
+                    future.set_exception(error)
+            return
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+def execute_many(connection, sql, rows):
+    return connection.executemany(sql, rows).rowcount
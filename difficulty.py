@@ -0,0 +1,232 @@
+import bisect
+import math
+import random
+
+import database
+
+# Ratings are on a logit scale (IRT/Rasch): a player rated r answers a question rated d correctly with
+# probability 1 / (1 + e^(d - r)). New questions and players start at 0
+DEFAULT_RATING = 0.0
+# Step sizes shrink as more answers come in, from K_MAX down towards K_MIN
+K_MAX = 0.8
+K_MIN = 0.1
+K_DECAY = 0.05
+# Questions are chosen so the player should get about this share right
+TARGET_SUCCESS = 0.7
+BUCKET_WIDTH = 0.25
+# A correct answer given at the time limit only counts as half right
+SLOW_ANSWER_CREDIT = 0.5
+
+# Rows hold DEFAULT_RATING plus every change written so far, each flush adds only its own change
+UPSERT_QUESTION_SQL = f'''INSERT INTO QuestionRating (question_id, rating, attempts) VALUES (?, {DEFAULT_RATING} + ?, ?)
+                          ON CONFLICT (question_id) DO UPDATE SET rating = rating + excluded.rating - {DEFAULT_RATING},
+                                                                  attempts = attempts + excluded.attempts'''
+UPSERT_USER_TOPIC_SQL = f'''INSERT INTO UserTopicRating (user_id, topic_id, rating, attempts) VALUES (?, ?, {DEFAULT_RATING} + ?, ?)
+                            ON CONFLICT (user_id, topic_id) DO UPDATE SET rating = rating + excluded.rating - {DEFAULT_RATING},
+                                                                          attempts = attempts + excluded.attempts'''
+
+
+def expected_score(player_rating, question_rating):
+    return 1 / (1 + math.exp(question_rating - player_rating))
+
+
+def answer_score(correct, time_taken, max_time):
+    if not correct:
+        return 0.0
+    slowness = min(max(time_taken / max_time, 0.0), 1.0)
+    return 1.0 - (1.0 - SLOW_ANSWER_CREDIT) * slowness
+
+
+def step_size(attempts):
+    return max(K_MIN, K_MAX / (1 + K_DECAY * attempts))
+
+
+def bucket_of(rating):
+    return math.floor(rating / BUCKET_WIDTH)
+
+
+class TopicIndex:
+    # Every question of a topic grouped into rating buckets. The sorted list of non-empty buckets is searched
+    # with bisect, each bucket is a list plus positions so members can be moved or picked at random in O(1)
+    def __init__(self):
+        self.bucket_keys = []
+        self.buckets = {}
+        self.question_buckets = {}
+        self.positions = {}
+
+    def add(self, question_id, rating):
+        bucket = bucket_of(rating)
+        members = self.buckets.get(bucket)
+        if members is None:
+            members = self.buckets[bucket] = []
+            bisect.insort(self.bucket_keys, bucket)
+        self.question_buckets[question_id] = bucket
+        self.positions[question_id] = len(members)
+        members.append(question_id)
+
+    def remove(self, question_id):
+        bucket = self.question_buckets.pop(question_id)
+        members = self.buckets[bucket]
+        position = self.positions.pop(question_id)
+        last = members.pop()
+        if last != question_id:
+            members[position] = last
+            self.positions[last] = position
+        if not members:
+            del self.buckets[bucket]
+            del self.bucket_keys[bisect.bisect_left(self.bucket_keys, bucket)]
+
+    def move(self, question_id, rating):
+        if bucket_of(rating) != self.question_buckets[question_id]:
+            self.remove(question_id)
+            self.add(question_id, rating)
+
+    def __len__(self):
+        return len(self.question_buckets)
+
+    def nearest(self, rating, k, exclude=(), rng=random):
+        # Up to k questions from the buckets closest to rating, working outwards from the target bucket
+        chosen = []
+        target = bucket_of(rating)
+        right = bisect.bisect_left(self.bucket_keys, target)
+        left = right - 1
+        while len(chosen) < k and (left >= 0 or right < len(self.bucket_keys)):
+            if right >= len(self.bucket_keys) or (left >= 0 and target - self.bucket_keys[left] < self.bucket_keys[right] - target):
+                members = self.buckets[self.bucket_keys[left]]
+                left -= 1
+            else:
+                members = self.buckets[self.bucket_keys[right]]
+                right += 1
+            # Sampling positions costs O(k) however big the bucket is, enough are drawn to skip every excluded ID
+            for position in rng.sample(range(len(members)), min(len(members), k - len(chosen) + len(exclude))):
+                if len(chosen) == k:
+                    break
+                if members[position] not in exclude:
+                    chosen.append(members[position])
+        return chosen
+
+
+class DifficultyEngine:
+    # Question and user-topic ratings, updated in O(1) per answer. Only the changes since the last flush are
+    # written, as deltas, so two copies of the game sharing main.db add to each other instead of overwriting
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else random.Random()
+        self.topics = {}
+        self.question_ratings = {}
+        self.question_attempts = {}
+        self.question_topics = {}
+        self.user_ratings = {}
+        self.question_changes = {}
+        self.user_changes = {}
+
+    def load_topic(self, connection, topic_id):
+        cursor = connection.execute('''SELECT Questions.question_id, QuestionRating.rating, QuestionRating.attempts
+                                       FROM Questions
+                                       LEFT JOIN QuestionRating ON QuestionRating.question_id = Questions.question_id
+                                       WHERE Questions.topic_id = ?''', (topic_id,))
+        index = TopicIndex()
+        while True:
+            rows = cursor.fetchmany(10000)
+            if not rows:
+                break
+            for question_id, rating, attempts in rows:
+                rating = DEFAULT_RATING if rating is None else rating
+                self.question_ratings[question_id] = rating
+                self.question_attempts[question_id] = attempts or 0
+                self.question_topics[question_id] = topic_id
+                index.add(question_id, rating)
+        self.topics[topic_id] = index
+        return index
+
+    def topic_index(self, topic_id, connection=None):
+        index = self.topics.get(topic_id)
+        if index is None:
+            own_connection = connection is None
+            if own_connection:
+                connection = database.connect()
+            index = self.load_topic(connection, topic_id)
+            if own_connection:
+                connection.close()
+        return index
+
+    def invalidate(self, topic_id=None):
+        # Unsaved changes are kept, only the cached ratings are dropped
+        if topic_id is None:
+            dropped = list(self.question_topics)
+            self.topics.clear()
+        else:
+            dropped = [question_id for question_id, topic in self.question_topics.items() if topic == topic_id]
+            self.topics.pop(topic_id, None)
+        for question_id in dropped:
+            del self.question_ratings[question_id], self.question_attempts[question_id], self.question_topics[question_id]
+
+    def user_rating(self, user_id, topic_id, connection=None):
+        # Guests (user_id None) get a rating for this run of the game only
+        key = (user_id, topic_id)
+        if key not in self.user_ratings:
+            rating, attempts = DEFAULT_RATING, 0
+            if user_id is not None:
+                own_connection = connection is None
+                if own_connection:
+                    connection = database.connect()
+                row = connection.execute("SELECT rating, attempts FROM UserTopicRating WHERE user_id = ? AND topic_id = ?",
+                                         key).fetchone()
+                if own_connection:
+                    connection.close()
+                if row is not None:
+                    rating, attempts = row
+            self.user_ratings[key] = [rating, attempts]
+        return self.user_ratings[key][0]
+
+    def select(self, user_id, topic_id, k, exclude=(), connection=None, rng=None):
+        # The k questions closest to the difficulty the player should get TARGET_SUCCESS of right
+        index = self.topic_index(topic_id, connection)
+        rating = self.user_rating(user_id, topic_id, connection)
+        target = rating - math.log(TARGET_SUCCESS / (1 - TARGET_SUCCESS))
+        return index.nearest(target, k, exclude, rng if rng is not None else self.rng)
+
+    def preload(self, user_id, topic_id, connection=None):
+        # Everything record_answer needs, so answering never has to read the database
+        self.topic_index(topic_id, connection)
+        self.user_rating(user_id, topic_id, connection)
+
+    def record_answer(self, user_id, topic_id, question_id, correct, time_taken, max_time):
+        # Generated questions (no question_id) and questions from topics that were never loaded are not rated
+        if question_id is None or question_id not in self.question_ratings:
+            return None
+        self.user_rating(user_id, topic_id)
+        index = self.topic_index(topic_id)
+        user_entry = self.user_ratings[(user_id, topic_id)]
+        question_rating = self.question_ratings[question_id]
+        surprise = answer_score(correct, time_taken, max_time) - expected_score(user_entry[0], question_rating)
+        user_step = step_size(user_entry[1]) * surprise
+        question_step = -step_size(self.question_attempts[question_id]) * surprise
+        user_entry[0] += user_step
+        user_entry[1] += 1
+        self.question_ratings[question_id] = question_rating + question_step
+        self.question_attempts[question_id] += 1
+        index.move(question_id, question_rating + question_step)
+        change = self.question_changes.setdefault(question_id, [0.0, 0])
+        change[0] += question_step
+        change[1] += 1
+        if user_id is not None:
+            change = self.user_changes.setdefault((user_id, topic_id), [0.0, 0])
+            change[0] += user_step
+            change[1] += 1
+        return user_entry[0]
+
+    def flush(self, writer):
+        if not self.question_changes and not self.user_changes:
+            return None
+        question_rows = [(question_id, delta, count) for question_id, (delta, count) in self.question_changes.items()]
+        user_rows = [(user_id, topic_id, delta, count) for (user_id, topic_id), (delta, count) in self.user_changes.items()]
+        self.question_changes, self.user_changes = {}, {}
+        return writer.submit(save_ratings, question_rows, user_rows)
+
+
+def save_ratings(connection, question_rows, user_rows):
+    connection.executemany(UPSERT_QUESTION_SQL, question_rows)
+    connection.executemany(UPSERT_USER_TOPIC_SQL, user_rows)
+
+
+engine = DifficultyEngine()
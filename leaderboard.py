@@ -0,0 +1,55 @@
+import bisect
+
+TOP_N = 10
+
+
+class LeaderboardCache:
+    # Top N scores per (character_id, subject_id, topic_id). Each board is read from the covering index once,
+    # after that new high scores are merged in place instead of re-running the ORDER BY
+    def __init__(self, size=TOP_N):
+        self.size = size
+        self.boards = {}
+
+    def load(self, connection, key):
+        character_id, subject_id, topic_id = key
+        cursor = connection.execute('''SELECT HighScore.high_score, HighScore.user_id, User.username
+                                       FROM HighScore
+                                       JOIN User ON User.user_id = HighScore.user_id
+                                       WHERE HighScore.character_id = ? AND HighScore.subject_id = ? AND HighScore.topic_id = ?
+                                       ORDER BY HighScore.high_score DESC, HighScore.user_id
+                                       LIMIT ?''', (character_id, subject_id, topic_id, self.size))
+        # Stored as (-score, user_id, username) so the list stays in ascending order for bisect
+        board = [(-high_score, user_id, username) for high_score, user_id, username in cursor.fetchall()]
+        self.boards[key] = board
+        return board
+
+    def get_top(self, connection, key):
+        board = self.boards.get(key)
+        if board is None:
+            board = self.load(connection, key)
+        return [(username, -negative_score) for negative_score, user_id, username in board]
+
+    def record(self, key, user_id, username, score):
+        board = self.boards.get(key)
+        if board is None:
+            return
+        for index, (negative_score, other_user_id, other_username) in enumerate(board):
+            if other_user_id == user_id:
+                if -negative_score >= score:
+                    return
+                del board[index]
+                break
+        entry = (-score, user_id, username)
+        if len(board) >= self.size and entry >= board[-1]:
+            return
+        bisect.insort(board, entry)
+        del board[self.size:]
+
+    def invalidate(self, key=None):
+        if key is None:
+            self.boards.clear()
+        else:
+            self.boards.pop(key, None)
+
+
+cache = LeaderboardCache()
@@ -0,0 +1,64 @@
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# scrypt work factor. Raising any of these makes new hashes slower to compute (and to crack),
+# existing hashes keep their own parameters and are upgraded the next time their owner logs in
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+
+# One background thread so hashing never blocks the frame loop, hashlib releases the GIL while it works
+executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="PasswordHasher")
+
+
+def hash_password(password, salt=None, n=None, r=None, p=None):
+    n = n or SCRYPT_N
+    r = r or SCRYPT_R
+    p = p or SCRYPT_P
+    if salt is None:
+        salt = os.urandom(SALT_BYTES)
+    digest = hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                            maxmem=128 * r * (n + p + 2) + 1024 * 1024, dklen=32)
+    return f"scrypt${n}${r}${p}${digest.hex()}", salt
+
+
+def legacy_hash(password, salt):
+    # The original DJB-style hash, only kept so old accounts can still log in and be upgraded
+    if isinstance(salt, str):
+        salt = salt.encode('utf-8')
+    combined = password.encode('utf-8') + salt
+    hash_value = 10061
+    for byte in combined:
+        hash_value = ((hash_value << 5) + hash_value) ^ byte
+    return hex(hash_value)
+
+
+def verify_password(password, stored_hash, salt):
+    # Returns (matches, needs_rehash)
+    if stored_hash.startswith("scrypt$"):
+        _, n, r, p, _ = stored_hash.split("$")
+        n, r, p = int(n), int(r), int(p)
+        new_hash, _ = hash_password(password, salt, n, r, p)
+        matches = hmac.compare_digest(new_hash, stored_hash)
+        return matches, matches and (n, r, p) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    matches = hmac.compare_digest(legacy_hash(password, salt), stored_hash)
+    return matches, matches
+
+
+def verify_and_upgrade(password, stored_hash, salt):
+    # Returns (matches, (new_hash, new_salt) or None), the new hash uses the current work factor
+    matches, needs_rehash = verify_password(password, stored_hash, salt)
+    if needs_rehash:
+        return matches, hash_password(password)
+    return matches, None
+
+
+def hash_password_async(password):
+    return executor.submit(hash_password, password)
+
+
+def verify_and_upgrade_async(password, stored_hash, salt):
+    return executor.submit(verify_and_upgrade, password, stored_hash, salt)
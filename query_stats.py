@@ -0,0 +1,139 @@
+import logging
+import re
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger("queries")
+
+SLOW_QUERY_MS = 20
+# Upper bounds (ms) of the latency histogram buckets, anything slower goes in the last bucket
+BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100)
+
+
+def normalise(sql):
+    # Statements that differ only in their literals or IN list length are grouped together
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"\b\d+(?:\.\d+)?\b", "?", sql)
+    sql = re.sub(r"\(\s*\?(?:\s*,\s*\?)*\s*\)", "(...)", sql)
+    return " ".join(sql.split())
+
+
+class StatementStats:
+    __slots__ = ("count", "total_ms", "max_ms", "histogram")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, ms):
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        for bucket, limit in enumerate(BUCKETS_MS):
+            if ms <= limit:
+                self.histogram[bucket] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+
+
+class QueryStats:
+    def __init__(self, slow_query_ms=SLOW_QUERY_MS):
+        self.slow_query_ms = slow_query_ms
+        self.lock = threading.Lock()
+        self.screen = "startup"
+        self.frame = 0
+        self.frame_queries = 0
+        self.statements = {}
+        # screen -> [frames that queried, queries, most queries in one frame]
+        self.screens = {}
+        self.last_query_frame = {}
+        self.flagged_screens = set()
+
+    def begin_frame(self, screen):
+        self.frame += 1
+        self.screen = screen
+        self.frame_queries = 0
+
+    def record(self, sql, ms):
+        key = normalise(sql)
+        on_frame_loop = threading.current_thread() is threading.main_thread()
+        source = self.screen if on_frame_loop else threading.current_thread().name
+        with self.lock:
+            if key not in self.statements:
+                self.statements[key] = StatementStats()
+            self.statements[key].add(ms)
+            if source not in self.screens:
+                self.screens[source] = [0, 0, 0]
+            screen_stats = self.screens[source]
+            screen_stats[1] += 1
+            if on_frame_loop:
+                self.frame_queries += 1
+                if self.last_query_frame.get(source) != self.frame:
+                    screen_stats[0] += 1
+                screen_stats[2] = max(screen_stats[2], self.frame_queries)
+        if ms > self.slow_query_ms:
+            logger.warning("slow query (%.1f ms) on %s frame %d: %s", ms, source, self.frame, key)
+        if on_frame_loop:
+            if self.last_query_frame.get(source) == self.frame - 1 and source not in self.flagged_screens:
+                self.flagged_screens.add(source)
+                logger.warning("%s is querying the database on consecutive frames (%s)", source, key)
+            self.last_query_frame[source] = self.frame
+
+    def report(self):
+        with self.lock:
+            lines = ["screen                    frames  queries  max/frame"]
+            for screen, (frames, queries, most) in sorted(self.screens.items(), key=lambda item: -item[1][1]):
+                flag = "  consecutive frames!" if screen in self.flagged_screens else ""
+                lines.append(f"{str(screen):<24} {frames:>7} {queries:>8} {most:>10}{flag}")
+            buckets = " ".join(f"<={limit}" for limit in BUCKETS_MS) + " slower"
+            lines.append(f"\n  count   total ms   mean ms    max ms  histogram ms ({buckets})  statement")
+            for sql, stats in sorted(self.statements.items(), key=lambda item: -item[1].total_ms):
+                lines.append(f"{stats.count:>7} {stats.total_ms:>10.2f} {stats.total_ms / stats.count:>9.3f} "
+                             f"{stats.max_ms:>9.3f}  {stats.histogram}  {sql[:100]}")
+        return "\n".join(lines)
+
+
+stats = QueryStats()
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    # Only the execute step is timed, for the small result sets the game reads that is nearly all of the work
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            stats.record(sql, (time.perf_counter() - start) * 1000)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            stats.record(sql, (time.perf_counter() - start) * 1000)
+
+    def executescript(self, sql_script):
+        start = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            stats.record(sql_script, (time.perf_counter() - start) * 1000)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    # Passed as the factory to sqlite3.connect so every statement is timed and attributed to a screen
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
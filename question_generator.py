@@ -0,0 +1,231 @@
+import random
+
+# Topics that get generated questions mixed in with the stored ones, and the share of each game that is generated
+GENERATED_TOPICS = {"fundamentals_of_data_representation": 0.5}
+BITS = 8
+# Floating point questions use a two's complement mantissa with the point after the sign bit and a two's
+# complement exponent, as in the A level specification
+MANTISSA_BITS = 8
+EXPONENT_BITS = 4
+
+
+def to_binary(value, bits=BITS):
+    # Negative values come out in two's complement
+    return format(value & ((1 << bits) - 1), f"0{bits}b")
+
+
+def from_twos_complement(value, bits=BITS):
+    return value - (1 << bits) if value >> (bits - 1) else value
+
+
+def format_number(value):
+    # Every value here is an exact binary fraction, so str() gives all of its digits
+    if value == int(value):
+        return str(int(value))
+    return str(value)
+
+
+def choose_distractors(rng, correct, candidates, make_wrong):
+    # Three different wrong answers, picked from the likely mistakes first with random near misses to fill any gaps
+    mistakes = []
+    for candidate in candidates:
+        if candidate != correct and candidate not in mistakes:
+            mistakes.append(candidate)
+    distractors = rng.sample(mistakes, 3) if len(mistakes) > 3 else mistakes
+    while len(distractors) < 3:
+        candidate = make_wrong()
+        if candidate != correct and candidate not in distractors:
+            distractors.append(candidate)
+    return distractors
+
+
+def denary_to_binary(rng):
+    value = rng.randrange(1, 1 << BITS)
+    correct = to_binary(value)
+    candidates = [correct[::-1], to_binary(value ^ (1 << rng.randrange(BITS))), to_binary(value + 1), to_binary(value - 1)]
+    return (f"What is the denary number {value} in {BITS}-bit unsigned binary?", correct,
+            choose_distractors(rng, correct, candidates, lambda: to_binary(value ^ rng.randrange(1, 1 << BITS))))
+
+
+def binary_to_denary(rng):
+    value = rng.randrange(1, 1 << BITS)
+    binary = to_binary(value)
+    correct = str(value)
+    candidates = [str(int(binary[::-1], 2)), str(value ^ (1 << rng.randrange(BITS))), str(from_twos_complement(value)),
+                  str(value + 1), str(value - 1)]
+    return (f"What is the unsigned binary number {binary} in denary?", correct,
+            choose_distractors(rng, correct, candidates, lambda: str(value + rng.choice((-1, 1)) * rng.randrange(2, 17))))
+
+
+def hex_to_denary(rng):
+    value = rng.randrange(16, 1 << BITS)
+    high, low = divmod(value, 16)
+    correct = str(value)
+    candidates = [str(low * 16 + high), str(high * 10 + low), str(high * 16), str(value + 16), str(value - 16)]
+    return (f"What is the hexadecimal number {value:X} in denary?", correct,
+            choose_distractors(rng, correct, candidates, lambda: str(value + rng.choice((-1, 1)) * rng.randrange(1, 10))))
+
+
+def denary_to_hex(rng):
+    value = rng.randrange(16, 1 << BITS)
+    high, low = divmod(value, 16)
+    correct = f"{value:X}"
+    candidates = [f"{low:X}{high:X}", f"{value // 10:X}{value % 10}", f"{(value + 16) % 256:X}", f"{value - 1:X}", f"{value + 1:X}"]
+    return (f"What is the denary number {value} in hexadecimal?", correct,
+            choose_distractors(rng, correct, candidates, lambda: f"{rng.randrange(16, 1 << BITS):X}"))
+
+
+def binary_to_hex(rng):
+    value = rng.randrange(16, 1 << BITS)
+    high, low = divmod(value, 16)
+    correct = f"{value:X}"
+    candidates = [f"{low:X}{high:X}", f"{high:X}{low ^ 1:X}", f"{high ^ 1:X}{low:X}", f"{int(to_binary(value)[::-1], 2):X}"]
+    if low > 9:
+        # Writing a nibble in denary instead of as a hex digit
+        candidates.append(f"{high:X}{low}")
+    return (f"What is the binary number {to_binary(value)} in hexadecimal?", correct,
+            choose_distractors(rng, correct, candidates, lambda: f"{rng.randrange(16, 1 << BITS):X}"))
+
+
+def twos_complement_to_denary(rng):
+    value = rng.randrange(1 << (BITS - 1), 1 << BITS) if rng.random() < 0.8 else rng.randrange(1, 1 << (BITS - 1))
+    signed = from_twos_complement(value)
+    correct = str(signed)
+    magnitude = value & ((1 << (BITS - 1)) - 1)
+    candidates = [str(value), str(-magnitude), str(-(((1 << BITS) - 1) - value)), str(-signed), str(signed - 1)]
+    return (f"What is the {BITS}-bit two's complement number {to_binary(value)} in denary?", correct,
+            choose_distractors(rng, correct, candidates, lambda: str(signed + rng.choice((-1, 1)) * rng.randrange(2, 9))))
+
+
+def denary_to_twos_complement(rng):
+    value = -rng.randrange(1, (1 << (BITS - 1)) + 1)
+    correct = to_binary(value)
+    candidates = [to_binary(-value), to_binary(value - 1), to_binary(value + 1)]
+    if -value < 1 << (BITS - 1):
+        # Sign and magnitude
+        candidates.append("1" + to_binary(-value, BITS - 1))
+    return (f"What is {value} as an {BITS}-bit two's complement binary number?", correct,
+            choose_distractors(rng, correct, candidates, lambda: to_binary(value ^ (1 << rng.randrange(BITS - 1)))))
+
+
+def fixed_point_to_denary(rng):
+    fraction_bits = rng.randrange(2, 6)
+    value = rng.randrange(1, 1 << BITS)
+    binary = to_binary(value)
+    whole, fraction = binary[:BITS - fraction_bits], binary[BITS - fraction_bits:]
+    correct = format_number(value / (1 << fraction_bits))
+    candidates = [str(value), format_number(value / (1 << (fraction_bits - 1))), format_number(value / (1 << (fraction_bits + 1))),
+                  f"{int(whole, 2)}.{int(fraction, 2)}"]
+    return (f"What is the unsigned fixed point binary number {whole}.{fraction} in denary?", correct,
+            choose_distractors(rng, correct, candidates,
+                               lambda: format_number(rng.randrange(1, 1 << BITS) / (1 << fraction_bits))))
+
+
+def normalised_mantissa(rng, trailing_zeros=0):
+    # 01... for positive and 10... for negative, with the lowest trailing_zeros bits clear
+    mantissa = (0b01 if rng.random() < 0.5 else 0b10) << (MANTISSA_BITS - 2)
+    mantissa |= rng.randrange(1 << (MANTISSA_BITS - 2)) >> trailing_zeros << trailing_zeros
+    return mantissa
+
+
+def arithmetic_shift_right(mantissa, places):
+    return to_binary(from_twos_complement(mantissa, MANTISSA_BITS) >> places, MANTISSA_BITS)
+
+
+def float_text(mantissa, exponent):
+    return f"{mantissa} {to_binary(exponent, EXPONENT_BITS)}"
+
+
+def normalise_float(rng):
+    lowest_exponent = -(1 << (EXPONENT_BITS - 1))
+    highest_exponent = (1 << (EXPONENT_BITS - 1)) - 1
+    places = rng.randrange(1, 4)
+    mantissa = normalised_mantissa(rng, places)
+    exponent = rng.randrange(lowest_exponent, highest_exponent - places + 1)
+    unnormalised = arithmetic_shift_right(mantissa, places)
+    correct = float_text(to_binary(mantissa, MANTISSA_BITS), exponent)
+    candidates = [float_text(to_binary(mantissa, MANTISSA_BITS), exponent + places),
+                  float_text(arithmetic_shift_right(mantissa, 1), exponent + 1),
+                  float_text(to_binary(mantissa, MANTISSA_BITS), exponent + places - 1)]
+    if exponent - places >= lowest_exponent:
+        # Exponent moved the wrong way
+        candidates.append(float_text(to_binary(mantissa, MANTISSA_BITS), exponent - places))
+    if exponent > lowest_exponent:
+        # Shifted one place too far, losing the sign
+        candidates.append(float_text(to_binary(mantissa << 1, MANTISSA_BITS), exponent - 1))
+    return (f"Normalise the floating point number {float_text(unnormalised, exponent + places)} "
+            f"({MANTISSA_BITS}-bit mantissa, {EXPONENT_BITS}-bit exponent, both two's complement).", correct,
+            choose_distractors(rng, correct, candidates,
+                               lambda: float_text(to_binary(mantissa, MANTISSA_BITS), rng.randrange(lowest_exponent, highest_exponent + 1))))
+
+
+def float_to_denary(rng):
+    mantissa = normalised_mantissa(rng)
+    exponent = rng.randrange(-2, 6)
+    fraction = from_twos_complement(mantissa, MANTISSA_BITS) / (1 << (MANTISSA_BITS - 1))
+    correct = format_number(fraction * 2 ** exponent)
+    candidates = [format_number(fraction * 2 ** -exponent), format_number(fraction * 2 ** (exponent + 1)),
+                  format_number(fraction * 2 ** (exponent - 1)), format_number(-fraction * 2 ** exponent),
+                  format_number(mantissa / (1 << (MANTISSA_BITS - 1)) * 2 ** exponent)]
+    return (f"What is the normalised floating point number {float_text(to_binary(mantissa, MANTISSA_BITS), exponent)} "
+            f"({MANTISSA_BITS}-bit mantissa, {EXPONENT_BITS}-bit exponent, both two's complement) in denary?", correct,
+            choose_distractors(rng, correct, candidates,
+                               lambda: format_number(fraction * 2 ** rng.randrange(-4, 8))))
+
+
+def bitwise(rng):
+    a, b = rng.randrange(1 << BITS), rng.randrange(1 << BITS)
+    results = {"AND": a & b, "OR": a | b, "XOR": a ^ b}
+    operation = rng.choice(("AND", "OR", "XOR", "NOT", "shift"))
+    if operation == "NOT":
+        correct = to_binary(~a)
+        candidates = [to_binary(a), to_binary(-a), to_binary(int(to_binary(a)[::-1], 2)), to_binary(~a ^ 1)]
+        text = f"What is NOT {to_binary(a)}?"
+    elif operation == "shift":
+        places = rng.randrange(1, 4)
+        left = rng.random() < 0.5
+        correct = to_binary(a << places if left else a >> places)
+        candidates = [to_binary(a >> places if left else a << places), to_binary(a << (places + 1) if left else a >> (places + 1)),
+                      to_binary(a << (places - 1) if left else a >> (places - 1))]
+        text = f"What is {to_binary(a)} after a logical shift {'left' if left else 'right'} by {places} places?"
+    else:
+        correct = to_binary(results[operation])
+        candidates = [to_binary(result) for name, result in results.items() if name != operation]
+        candidates.append(to_binary(~results[operation]))
+        text = f"What is {to_binary(a)} {operation} {to_binary(b)}?"
+    return text, correct, choose_distractors(rng, correct, candidates, lambda: to_binary(rng.randrange(1 << BITS)))
+
+
+GENERATORS = {
+    "denary_to_binary": denary_to_binary,
+    "binary_to_denary": binary_to_denary,
+    "hex_to_denary": hex_to_denary,
+    "denary_to_hex": denary_to_hex,
+    "binary_to_hex": binary_to_hex,
+    "twos_complement_to_denary": twos_complement_to_denary,
+    "denary_to_twos_complement": denary_to_twos_complement,
+    "fixed_point_to_denary": fixed_point_to_denary,
+    "normalise_float": normalise_float,
+    "float_to_denary": float_to_denary,
+    "bitwise": bitwise,
+}
+
+
+class QuestionGenerator:
+    # An endless supply of questions built from random values, with no database reads. Everything comes from rng,
+    # so the same seed gives the same questions
+    def __init__(self, rng=None, kinds=None):
+        self.rng = rng if rng is not None else random.Random()
+        self.kinds = list(kinds) if kinds is not None else list(GENERATORS)
+
+    def generate(self):
+        # Same shape as the rows from questions.fetch_questions_by_id, generated questions have no question_id
+        question_text, correct_answer, distractors = GENERATORS[self.rng.choice(self.kinds)](self.rng)
+        return (None, question_text, correct_answer, distractors[0], distractors[1], distractors[2])
+
+    def generate_many(self, count):
+        return [self.generate() for _ in range(count)]
+
+
+def generated_share(topic_name):
+    return GENERATED_TOPICS.get(topic_name, 0)
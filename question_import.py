@@ -0,0 +1,163 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import database
+import difficulty
+import questions
+
+FIELDS = ("topic", "subject", "question_text", "correct_answer", "option_1", "option_2", "option_3")
+REQUIRED_FIELDS = ("question_text", "correct_answer", "option_1", "option_2", "option_3")
+INSERT_SQL = '''INSERT OR IGNORE INTO Questions (topic_id, subject_id, question_text, correct_answer, option_1, option_2, option_3)
+                VALUES (?, ?, ?, ?, ?, ?, ?)'''
+UPSERT_SQL = '''INSERT INTO Questions (topic_id, subject_id, question_text, correct_answer, option_1, option_2, option_3)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (question_text) DO UPDATE SET topic_id = excluded.topic_id, subject_id = excluded.subject_id,
+                    correct_answer = excluded.correct_answer, option_1 = excluded.option_1,
+                    option_2 = excluded.option_2, option_3 = excluded.option_3'''
+
+
+def read_csv(file):
+    yield from csv.DictReader(file)
+
+
+def read_ndjson(file):
+    for line in file:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def read_json(file, chunk_size=1 << 16):
+    # Walks a top level JSON array one object at a time so the whole pack never has to be in memory
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+    while True:
+        chunk = file.read(chunk_size)
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if not started and position < len(buffer):
+                if buffer[position] != "[":
+                    raise ValueError("JSON question packs must be an array of objects")
+                started = True
+                position += 1
+                continue
+            if position < len(buffer) and buffer[position] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not chunk:
+                    raise
+                break
+            yield item
+            position = end
+        if not chunk:
+            return
+
+
+READERS = {".csv": read_csv, ".json": read_json, ".ndjson": read_ndjson, ".jsonl": read_ndjson}
+
+
+class ImportStats:
+    def __init__(self, update=False):
+        self.update = update
+        self.read = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.start = time.perf_counter()
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def summary(self):
+        elapsed = self.elapsed()
+        imported = "imported or updated" if self.update else "imported"
+        return (f"{self.read} rows read, {self.inserted} {imported}, {self.duplicates} duplicates skipped, "
+                f"{self.rejected} rejected in {elapsed:.1f}s ({self.read / max(elapsed, 1e-9):.0f} rows/s)")
+
+
+def resolve_rows(records, names, stats):
+    for record in records:
+        stats.read += 1
+        try:
+            topic_id = names.get_id("Topic", record["topic"])
+            subject_id = names.topic_subjects[topic_id]
+            if record.get("subject") and names.get_id("Subject", record["subject"]) != subject_id:
+                raise KeyError(record["subject"])
+            values = [record[field] for field in REQUIRED_FIELDS]
+            # A short CSV row leaves its last fields None, which the NOT NULL columns would reject along with the
+            # rest of the batch
+            if any(value is None or (isinstance(value, str) and not value.strip()) for value in values):
+                raise ValueError("missing field")
+            yield (topic_id, subject_id, *values)
+        except (KeyError, TypeError, ValueError):
+            stats.rejected += 1
+
+
+def import_questions(connection, records, batch_size=50000, update=False, progress=None):
+    names = database.NameCache()
+    names.load(connection)
+    stats = ImportStats(update)
+    sql = UPSERT_SQL if update else INSERT_SQL
+    batch = []
+    for row in resolve_rows(records, names, stats):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            write_batch(connection, sql, batch, stats)
+            batch = []
+            if progress:
+                progress(stats)
+    if batch:
+        write_batch(connection, sql, batch, stats)
+    # Anything in this process that cached content has to reload it
+    database.dimensions.invalidate()
+    questions.sampler.invalidate()
+    difficulty.engine.invalidate()
+    return stats
+
+
+def write_batch(connection, sql, batch, stats):
+    # rowcount only counts rows written by the statement itself, total_changes would also count the search index
+    # rows the FTS triggers write
+    with connection:
+        changes = connection.executemany(sql, batch).rowcount
+    stats.inserted += changes
+    stats.duplicates += len(batch) - changes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import a question pack (CSV, JSON or NDJSON) into content.db. "
+                                                 "Close the game before importing.")
+    parser.add_argument("pack", help="file with the columns/keys: " + ", ".join(FIELDS))
+    parser.add_argument("--format", choices=["csv", "json", "ndjson"], help="defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=50000, help="rows per transaction")
+    parser.add_argument("--update", action="store_true", help="overwrite questions that already exist instead of skipping them")
+    arguments = parser.parse_args(argv)
+
+    if arguments.format:
+        reader = READERS["." + arguments.format]
+    else:
+        reader = READERS.get(os.path.splitext(arguments.pack)[1].lower())
+        if reader is None:
+            parser.error("unknown file type, use --format")
+    database.ensure_schema()
+    connection = database.connect_content()
+    with open(arguments.pack, newline="", encoding="utf-8") as file:
+        stats = import_questions(connection, reader(file), arguments.batch_size, arguments.update,
+                                 progress=lambda stats: print(stats.summary(), file=sys.stderr))
+    connection.close()
+    print(stats.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import random
+import re
+import sys
+from array import array
+
+# SQLite builds before 3.32 only allow 999 bound parameters per statement
+MAX_PARAMETERS = 900
+
+
+class QuestionSampler:
+    # Keeps every question ID per topic so k random questions cost O(k) instead of sorting the whole topic
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else random.Random()
+        self.topic_question_ids = {}
+
+    def load_topic(self, connection, topic_id):
+        # Ordered so a seeded rng always picks the same questions
+        cursor = connection.execute('SELECT question_id FROM Questions WHERE topic_id = ? ORDER BY question_id', (topic_id,))
+        question_ids = array("q")
+        while True:
+            rows = cursor.fetchmany(10000)
+            if not rows:
+                break
+            question_ids.extend(row[0] for row in rows)
+        self.topic_question_ids[topic_id] = question_ids
+        return question_ids
+
+    def invalidate(self, topic_id=None):
+        if topic_id is None:
+            self.topic_question_ids.clear()
+        else:
+            self.topic_question_ids.pop(topic_id, None)
+
+    def topic_size(self, connection, topic_id):
+        question_ids = self.topic_question_ids.get(topic_id)
+        if question_ids is None:
+            question_ids = self.load_topic(connection, topic_id)
+        return len(question_ids)
+
+    def sample_ids(self, connection, topic_id, k, rng=None):
+        rng = rng if rng is not None else self.rng
+        question_ids = self.topic_question_ids.get(topic_id)
+        if question_ids is None:
+            question_ids = self.load_topic(connection, topic_id)
+        return rng.sample(question_ids, min(k, len(question_ids)))
+
+    def sample(self, connection, topic_id, k):
+        return fetch_questions_by_id(connection, self.sample_ids(connection, topic_id, k))
+
+
+def fetch_questions_by_id(connection, question_ids):
+    # Returns (question_id, question_text, correct_answer, option_1, option_2, option_3) in the order asked for
+    rows = {}
+    for start in range(0, len(question_ids), MAX_PARAMETERS):
+        chunk = question_ids[start:start + MAX_PARAMETERS]
+        placeholders = ", ".join("?" * len(chunk))
+        cursor = connection.execute(f'''SELECT question_id, question_text, correct_answer, option_1, option_2, option_3
+                                        FROM Questions
+                                        WHERE question_id IN ({placeholders})''', chunk)
+        for row in cursor.fetchall():
+            rows[row[0]] = row
+    return [rows[question_id] for question_id in question_ids if question_id in rows]
+
+
+def search_questions(connection, text, limit=20, topic_id=None):
+    # Every word must match (as a prefix), results come back best first. Matches in the question count most
+    terms = re.findall(r"\w+", text)
+    if not terms:
+        return []
+    match = " ".join(f'"{term}"*' for term in terms)
+    sql = '''SELECT Questions.question_id, Questions.topic_id, Questions.question_text, Questions.correct_answer,
+                    Questions.option_1, Questions.option_2, Questions.option_3
+             FROM QuestionSearch
+             JOIN Questions ON Questions.question_id = QuestionSearch.rowid
+             WHERE QuestionSearch MATCH ?'''
+    parameters = [match]
+    if topic_id is not None:
+        sql += " AND Questions.topic_id = ?"
+        parameters.append(topic_id)
+    sql += " ORDER BY bm25(QuestionSearch, 10.0, 3.0, 1.0, 1.0, 1.0) LIMIT ?"
+    parameters.append(limit)
+    return connection.execute(sql, parameters).fetchall()
+
+
+class QuestionRecord:
+    __slots__ = ("question_id", "topic_id", "question_text", "correct_answer", "options")
+
+    def __init__(self, question_id, topic_id, question_text, correct_answer, options):
+        self.question_id = question_id
+        self.topic_id = topic_id
+        self.question_text = question_text
+        self.correct_answer = correct_answer
+        self.options = options
+
+
+class QuestionBank:
+    # The whole Questions table held in memory so a game can be set up without touching the database
+    def __init__(self):
+        self.records = []
+        self.topic_index = {}
+        self.positions = {}
+
+    @classmethod
+    def load(cls, connection):
+        bank = cls()
+        cursor = connection.execute('''SELECT question_id, topic_id, question_text, correct_answer, option_1, option_2, option_3
+                                       FROM Questions''')
+        while True:
+            rows = cursor.fetchmany(10000)
+            if not rows:
+                break
+            for row in rows:
+                bank.add(*row)
+        return bank
+
+    def add(self, question_id, topic_id, question_text, correct_answer, option_1, option_2, option_3):
+        # Answers such as "RAM" or "True" repeat across many questions, interning stores each string once
+        correct_answer = sys.intern(correct_answer)
+        record = QuestionRecord(question_id, topic_id, question_text, correct_answer,
+                                (correct_answer, sys.intern(option_1), sys.intern(option_2), sys.intern(option_3)))
+        self.positions[question_id] = len(self.records)
+        self.records.append(record)
+        if topic_id not in self.topic_index:
+            self.topic_index[topic_id] = array("I")
+        self.topic_index[topic_id].append(len(self.records) - 1)
+
+    def topic_size(self, topic_id):
+        return len(self.topic_index.get(topic_id, ()))
+
+    def get(self, question_id):
+        return self.records[self.positions[question_id]]
+
+    def get_at(self, topic_id, index):
+        return self.records[self.topic_index[topic_id][index]]
+
+    def sample(self, topic_id, k, rng=random):
+        positions = self.topic_index.get(topic_id, ())
+        return [self.records[position] for position in rng.sample(positions, min(k, len(positions)))]
+
+    def memory_usage(self):
+        total = sys.getsizeof(self.records) + sys.getsizeof(self.topic_index) + sys.getsizeof(self.positions)
+        total += sum(sys.getsizeof(index) for index in self.topic_index.values())
+        seen_strings = set()
+        for record in self.records:
+            total += sys.getsizeof(record) + sys.getsizeof(record.options)
+            for text in (record.question_text,) + record.options:
+                if id(text) not in seen_strings:
+                    seen_strings.add(id(text))
+                    total += sys.getsizeof(text)
+        return total
+
+
+sampler = QuestionSampler()
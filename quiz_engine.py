@@ -0,0 +1,335 @@
+import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import answer_log
+import combat
+import database
+import difficulty
+import leaderboard
+import question_generator
+import questions
+import recently_seen
+import rng
+import scoring
+import spaced_repetition
+
+# The question queue is topped up in the background once it drops below LOW_WATER_MARK
+LOW_WATER_MARK = 5
+REFILL_SIZE = 20
+NO_QUESTIONS = 20
+MAX_HEALTH = 100
+ENDLESS_WRONG_DAMAGE = 20
+ANSWER_LOG_FLUSH = 200
+
+
+class Question():
+    __slots__ = ("question_id", "question_text", "answers", "correct_answer")
+
+    def __init__(self):
+        self.question_id = None
+        self.question_text = None
+        self.answers = []
+        self.correct_answer = None
+
+
+question_loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="QuestionLoader")
+
+
+class QuestionManager():
+    def __init__(self, user_id, topic_id, question_bank=None, rng=None, personalised=True, generator=None, adaptive=True,
+                 ratings=None, reviews=None):
+        self.questions = deque()  # Queue
+        self.user_id = user_id
+        self.topic_id = topic_id
+        self.question_bank = question_bank
+        self.rng = rng if rng is not None else questions.sampler.rng
+        # A shared or replayed game (the daily challenge, or one started from a seed) ignores reviews, ratings and
+        # recently seen questions, which change from one run to the next, so the same seed gets the same questions
+        self.personalised = personalised
+        self.adaptive = adaptive
+        self.ratings = ratings if ratings is not None else difficulty.engine
+        self.reviews = reviews if reviews is not None else spaced_repetition.scheduler
+        self.remaining = None
+        self.connection = None
+        self.pending_refill = None
+        self.exhausted = False
+        self.excluded = recently_seen.Exclusions(recently_seen.RecentlySeen())
+        self.generator = generator
+        self.generated_share = 0
+        if generator is not None:
+            self.generated_share = question_generator.generated_share(database.dimensions.get_name("Topic", topic_id))
+
+    def fetch_question_ids(self, no_questions):
+        user_id = self.user_id
+        topic_id = self.topic_id
+        excluded = self.excluded
+        question_ids = []
+        if self.personalised:
+            # Questions due for review come first, most overdue first, the rest of the game is new or not yet due.
+            # Nothing recently seen or already queued is picked again
+            question_ids = [question_id for question_id in self.reviews.due(user_id, topic_id, no_questions + len(excluded))
+                            if question_id not in excluded][:no_questions]
+            excluded.queue(question_ids)
+        needed = no_questions - len(question_ids)
+        if needed == 0:
+            return question_ids
+        if self.adaptive and self.personalised:
+            # Matched to the player's rating for the topic instead of picked uniformly
+            new_ids = self.ratings.select(user_id, topic_id, needed, exclude=excluded, rng=self.rng)
+        else:
+            if self.question_bank is not None:
+                candidates = [record.question_id for record in self.question_bank.sample(topic_id, needed + len(excluded), self.rng)]
+            else:
+                # The sampler keeps the topic's IDs after the first batch, so refills only connect if they were dropped
+                if topic_id not in questions.sampler.topic_question_ids:
+                    connection = database.connect()
+                    questions.sampler.load_topic(connection, topic_id)
+                    connection.close()
+                candidates = questions.sampler.sample_ids(None, topic_id, needed + len(excluded), self.rng)
+            new_ids = [question_id for question_id in candidates if question_id not in excluded][:needed]
+        excluded.queue(new_ids)
+        return question_ids + new_ids
+
+    def fetch_questions(self, question_ids):
+        if self.question_bank is not None:
+            return [(record.question_id, record.question_text) + record.options
+                    for record in map(self.question_bank.get, question_ids)]
+        # Only ever run on the loader thread, which keeps one connection for the whole game
+        if self.connection is None:
+            self.connection = database.connect()
+        return questions.fetch_questions_by_id(self.connection, question_ids)
+
+    def close(self):
+        # The connection belongs to the loader thread, so it is closed there, after any refill still queued
+        question_loader.submit(self.close_connection)
+
+    def close_connection(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def create_questions(self, question_ids, generated=()):
+        data = self.fetch_questions(question_ids)
+        # Positions are ascending, so each generated question lands where it was placed in the batch
+        for position, row in generated:
+            data.insert(position, row)
+        new_questions = []
+        for question in data:
+            new_question = Question()
+            new_question.question_id = question[0]
+            new_question.question_text = question[1]
+            new_question.answers = [question[2], question[3], question[4], question[5]]
+            new_question.correct_answer = question[2]
+            new_questions.append(new_question)
+        return new_questions
+
+    def start(self, no_questions=None):
+        # no_questions None streams questions until the topic runs out or the game is ended
+        self.remaining = no_questions
+        if self.personalised and self.user_id is not None:
+            connection = database.connect()
+            self.excluded = recently_seen.Exclusions(recently_seen.RecentlySeen.load(connection, self.user_id))
+            connection.close()
+        self.questions.extend(question_loader.submit(self.create_questions, *self.next_batch()).result())
+
+    def next_batch(self):
+        # The stored question IDs for the next batch, and the generated questions with their places in it
+        size = REFILL_SIZE if self.remaining is None else min(REFILL_SIZE, self.remaining - len(self.questions))
+        if size <= 0:
+            return [], []
+        if self.generator is None or not self.generated_share:
+            return self.next_batch_ids(size), []
+        generator_rng = self.generator.rng
+        no_generated = sum(generator_rng.random() < self.generated_share for _ in range(size))
+        question_ids = self.next_batch_ids(size - no_generated)
+        # Once the stored questions run out the generated ones keep the game going
+        no_generated = size - len(question_ids)
+        # Generated on the game thread so a seeded game gets the same questions however the loader is scheduled
+        positions = sorted(generator_rng.sample(range(size), no_generated))
+        return question_ids, list(zip(positions, self.generator.generate_many(no_generated)))
+
+    def next_batch_ids(self, size):
+        if size <= 0:
+            return []
+        # IDs are picked here on the game thread, the ratings and schedules they come from are only ever used on it
+        question_ids = self.fetch_question_ids(size)
+        seen = self.excluded.seen
+        while len(question_ids) < size and len(seen):
+            # A topic smaller than the window can't fill a batch, let the oldest seen questions back in
+            for _ in range(min(size, len(seen))):
+                seen.discard_oldest()
+            question_ids += self.fetch_question_ids(size - len(question_ids))
+        return question_ids
+
+    def refill(self):
+        if self.pending_refill is not None or self.exhausted:
+            return None
+        question_ids, generated = self.next_batch()
+        if not question_ids and not generated:
+            self.exhausted = True
+            return None
+        self.pending_refill = question_loader.submit(self.create_questions, question_ids, generated)
+
+    def get_next_question(self):
+        # Remove and return the first question, None once the game has had all of its questions
+        if self.remaining == 0:
+            return None
+        if len(self.questions) < LOW_WATER_MARK:
+            self.refill()
+        if self.pending_refill is not None and (self.pending_refill.done() or not self.questions):
+            # Only waits if answers come in faster than the loader, the first batch is always loaded up front
+            self.questions.extend(self.pending_refill.result())
+            self.pending_refill = None
+        if not self.questions:
+            return None
+        if self.remaining is not None:
+            self.remaining -= 1
+        question = self.questions.popleft()
+        if question.question_id is not None:
+            self.excluded.shown(question.question_id)
+        return question
+
+    def stream(self):
+        while True:
+            question = self.get_next_question()
+            if question is None:
+                return
+            yield question
+
+
+class QuizSession:
+    # One game in progress. A front end reads it to draw the game, only the engine changes it
+    def __init__(self, topic_id, mode, user_id, username, character_id, subject_id, no_questions, high_score, seed):
+        self.topic_id = topic_id
+        self.mode = mode
+        self.user_id = user_id
+        self.username = username
+        self.character_id = character_id
+        self.subject_id = subject_id
+        self.no_questions = no_questions
+        self.high_score = high_score
+        self.streams = rng.RandomStreams(seed)
+        self.seed = self.streams.seed
+        self.started_at = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.answer_log = answer_log.AnswerLog(user_id)
+        self.question_manager = None
+        self.battle = None
+        self.current_question = None
+        self.question_number = 0
+        self.score = 0
+        self.combo = 0
+        self.health = MAX_HEALTH
+        self.answered_questions = 0
+        self.correct_questions = 0
+        self.new_high_score = False
+        self.finished = False
+
+    def high_score_key(self):
+        return (self.character_id, self.subject_id, self.topic_id)
+
+
+class QuizEngine:
+    # The game without any screens: start a session, then next_question and submit_answer until next_question
+    # returns None, then finish. The front end times the answers. Everything is saved through writer (a
+    # db_writer.DatabaseWriter), with no writer nothing is saved, which is what bots and load tests want
+    def __init__(self, writer=None, question_bank=None, adaptive=True, generated=True, rules=scoring.DEFAULT_RULES,
+                 ratings=None, reviews=None):
+        self.writer = writer
+        # Ratings and review schedules are kept between games and saved as deltas on the next flush, so an engine
+        # that saves nothing gets its own and never hands its answers to one that does
+        if ratings is None:
+            ratings = difficulty.engine if writer is not None else difficulty.DifficultyEngine()
+        if reviews is None:
+            reviews = spaced_repetition.scheduler if writer is not None else spaced_repetition.ReviewScheduler()
+        self.ratings = ratings
+        self.reviews = reviews
+        self.question_bank = question_bank
+        self.adaptive = adaptive
+        self.generated = generated
+        self.rules = rules
+
+    def start_session(self, character_id, topic_id, mode="classic", user_id=None, username=None, high_score=0, seed=None,
+                      no_questions=NO_QUESTIONS):
+        # The daily challenge has the same seed for everyone on the same day. Any other game started from a seed is
+        # treated as a replay, so its questions come from the seed alone and not the player's history
+        personalised = mode != "daily" and seed is None
+        if mode == "daily":
+            seed = rng.daily_seed()
+        if mode == "endless":
+            # Questions keep coming until the player runs out of health
+            no_questions = None
+        session = QuizSession(topic_id, mode, user_id, username, character_id, database.dimensions.subject_for_topic(topic_id),
+                              no_questions, high_score, seed)
+        generator = None
+        if self.generated:
+            generator = question_generator.QuestionGenerator(session.streams.stream("generated"))
+        session.question_manager = QuestionManager(user_id, topic_id, self.question_bank, session.streams.stream("questions"),
+                                                   personalised=personalised, generator=generator, adaptive=self.adaptive,
+                                                   ratings=self.ratings, reviews=self.reviews)
+        # Loaded now rather than on the first answer, which is handled on the frame thread
+        self.ratings.preload(user_id, topic_id)
+        if user_id is not None:
+            self.reviews.ensure_loaded(user_id, topic_id)
+        session.question_manager.start(no_questions)
+        if mode == "battle":
+            session.battle = combat.Battle(character_id, session.streams.stream("enemies"))
+        return session
+
+    def next_question(self, session):
+        # None once the game is over, the front end should then call finish
+        if session.finished or session.health == 0:
+            return None
+        question = session.question_manager.get_next_question()
+        session.current_question = question
+        if question is None:
+            return None
+        session.question_number += 1
+        session.streams.stream("answers").shuffle(question.answers)
+        return question
+
+    def submit_answer(self, session, answer, time_taken):
+        # answer is the chosen option's text, "" if the player ran out of time. Returns whether it was right
+        question = session.current_question
+        correct = answer == question.correct_answer
+        session.answered_questions += 1
+        if correct:
+            session.correct_questions += 1
+        session.score, session.combo = scoring.score_answer(session.score, session.combo, correct, time_taken, self.rules)
+        session.answer_log.record(question.question_id, answer, correct, time_taken, session.combo)
+        self.ratings.record_answer(session.user_id, session.topic_id, question.question_id, correct, time_taken,
+                                   self.rules.max_time)
+        self.reviews.record_answer(session.user_id, session.topic_id, question.question_id, correct, time_taken,
+                                   self.rules.max_time)
+        if self.writer is not None and len(session.answer_log.rows) >= ANSWER_LOG_FLUSH:
+            # Long endless runs save as they go so the log never grows without bound
+            session.answer_log.flush(self.writer)
+        if session.battle:
+            session.battle.answer(correct, session)
+        elif session.mode == "endless" and not correct:
+            session.health = max(0, session.health - ENDLESS_WRONG_DAMAGE)
+        session.current_question = None
+        return correct
+
+    def finish(self, session):
+        if session.finished:
+            return session
+        session.finished = True
+        session.question_manager.close()
+        session.new_high_score = session.user_id is not None and session.score > session.high_score
+        if self.writer is None:
+            return session
+        if session.new_high_score:
+            leaderboard.cache.record(session.high_score_key(), session.user_id, session.username, session.score)
+            self.writer.submit(database.save_high_score, session.user_id, session.character_id, session.subject_id,
+                               session.topic_id, session.score)
+        session.answer_log.flush(self.writer)
+        self.ratings.flush(self.writer)
+        self.reviews.flush(self.writer)
+        session.question_manager.excluded.seen.save(self.writer, session.user_id)
+        self.writer.submit(database.add_game_session, session.answer_log.session_id, session.user_id, session.seed,
+                           session.mode, session.character_id, session.subject_id, session.topic_id, session.score,
+                           session.started_at)
+        if session.battle and session.user_id is not None:
+            session.battle.kill_counter.flush(self.writer, session.user_id)
+        return session
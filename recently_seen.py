@@ -0,0 +1,141 @@
+import sys
+import zlib
+from array import array
+
+# How many of the latest questions are kept out of the next picks
+SEEN_WINDOW = 200
+WORD_BITS = 64
+# Blobs saved before the window kept its order hold a bitmap and start with zlib's own header instead
+ORDERED_BLOB = b"\x01"
+
+UPSERT_SQL = '''INSERT INTO SeenQuestions (user_id, seen) VALUES (?, ?)
+                ON CONFLICT (user_id) DO UPDATE SET seen = excluded.seen'''
+
+
+class RecentlySeen:
+    # The last `window` question IDs. A ring buffer gives the order they were seen in and a sparse bitset answers
+    # "seen?" in O(1). The bitset only keeps non-zero 64-bit words, in a small open-addressing table (linear
+    # probing, backward-shift deletes) held in two arrays, so memory depends on the window and not on how many
+    # questions there are
+    def __init__(self, window=SEEN_WINDOW):
+        self.window = window
+        self.ring = array("q", [0] * window)
+        self.start = 0
+        self.size = 0
+        capacity = 1
+        while capacity < window * 5 // 4 + 1:
+            capacity *= 2
+        self.mask = capacity - 1
+        self.keys = array("q", [-1] * capacity)
+        self.bits = array("Q", [0] * capacity)
+
+    def slot(self, word):
+        # The slot holding word, or the empty slot where it would go
+        position = (word * 0x9E3779B1) & self.mask
+        while self.keys[position] != -1 and self.keys[position] != word:
+            position = (position + 1) & self.mask
+        return position
+
+    def __contains__(self, question_id):
+        position = self.slot(question_id // WORD_BITS)
+        return (self.bits[position] >> (question_id % WORD_BITS)) & 1 == 1
+
+    def __len__(self):
+        return self.size
+
+    def add(self, question_id):
+        word = question_id // WORD_BITS
+        position = self.slot(word)
+        bit = 1 << (question_id % WORD_BITS)
+        if self.bits[position] & bit:
+            return None
+        if self.size == self.window:
+            self.discard_oldest()
+            position = self.slot(word)
+        self.ring[(self.start + self.size) % self.window] = question_id
+        self.size += 1
+        self.keys[position] = word
+        self.bits[position] |= bit
+
+    def discard_oldest(self):
+        question_id = self.ring[self.start]
+        self.start = (self.start + 1) % self.window
+        self.size -= 1
+        position = self.slot(question_id // WORD_BITS)
+        self.bits[position] &= ~(1 << (question_id % WORD_BITS))
+        if self.bits[position]:
+            return None
+        # The word is now empty, later entries of its probe run are shifted back so lookups never stop early
+        empty = position
+        position = (position + 1) & self.mask
+        while self.keys[position] != -1:
+            home = (self.keys[position] * 0x9E3779B1) & self.mask
+            if (position - home) & self.mask >= (position - empty) & self.mask:
+                self.keys[empty], self.bits[empty] = self.keys[position], self.bits[position]
+                empty = position
+            position = (position + 1) & self.mask
+        self.keys[empty] = -1
+        self.bits[empty] = 0
+
+    def memory_usage(self):
+        return sys.getsizeof(self.ring) + sys.getsizeof(self.keys) + sys.getsizeof(self.bits)
+
+    def to_blob(self):
+        # The window oldest first, zlib compressed, so a reload drops the same questions first as this one would
+        ordered = array("q", (self.ring[(self.start + position) % self.window] for position in range(self.size)))
+        return ORDERED_BLOB + zlib.compress(ordered.tobytes())
+
+    @classmethod
+    def from_blob(cls, blob, window=SEEN_WINDOW):
+        seen = cls(window)
+        if blob[:1] == ORDERED_BLOB:
+            ordered = array("q")
+            ordered.frombytes(zlib.decompress(blob[1:]))
+            for question_id in ordered:
+                seen.add(question_id)
+            return seen
+        # An old bitmap blob, as sorted (word index, bits) pairs. Its order was never saved
+        pairs = array("Q")
+        pairs.frombytes(zlib.decompress(blob))
+        for position in range(0, len(pairs), 2):
+            word, bits = pairs[position], pairs[position + 1]
+            while bits:
+                low_bit = bits & -bits
+                seen.add(word * WORD_BITS + low_bit.bit_length() - 1)
+                bits ^= low_bit
+        return seen
+
+    @classmethod
+    def load(cls, connection, user_id, window=SEEN_WINDOW):
+        # Guests start with an empty window every game
+        if user_id is not None:
+            row = connection.execute("SELECT seen FROM SeenQuestions WHERE user_id = ?", (user_id,)).fetchone()
+            if row is not None:
+                return cls.from_blob(row[0], window)
+        return cls(window)
+
+    def save(self, writer, user_id):
+        if user_id is None:
+            return None
+        return writer.submit_many(UPSERT_SQL, [(user_id, self.to_blob())])
+
+
+class Exclusions:
+    # What the question pickers must skip: the recently seen window plus anything already queued for this game.
+    # A question moves from queued to seen when it is shown
+    def __init__(self, seen):
+        self.seen = seen
+        self.queued = set()
+
+    def __contains__(self, question_id):
+        return question_id in self.queued or question_id in self.seen
+
+    def __len__(self):
+        return len(self.queued) + len(self.seen)
+
+    def queue(self, question_ids):
+        self.queued.update(question_ids)
+
+    def shown(self, question_id):
+        self.queued.discard(question_id)
+        self.seen.add(question_id)
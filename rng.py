@@ -0,0 +1,31 @@
+import datetime
+import hashlib
+import random
+import secrets
+
+
+class RandomStreams:
+    # Every bit of randomness in a game comes from one session seed. Each named stream ("stage", "questions",
+    # "answers", ...) is its own random.Random seeded from (seed, name), so drawing more from one stream never
+    # changes what another one produces, and replaying the seed replays everything drawn from them
+    def __init__(self, seed=None):
+        self.reseed(seed)
+
+    def reseed(self, seed=None):
+        self.seed = seed if seed is not None else secrets.randbits(63)
+        self.streams = {}
+        return self.seed
+
+    def stream(self, name):
+        if name not in self.streams:
+            digest = hashlib.sha256(f"{self.seed}:{name}".encode('utf-8')).digest()
+            self.streams[name] = random.Random(int.from_bytes(digest[:8], "big"))
+        return self.streams[name]
+
+
+def daily_seed(date=None):
+    # The same for every player on the same day, so everyone gets the same daily challenge
+    date = date if date is not None else datetime.date.today()
+    digest = hashlib.sha256(f"daily:{date.isoformat()}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], "big") >> 1
+
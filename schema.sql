@@ -1,61 +1,143 @@
-CREATE TABLE User (
-    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    username TEXT NOT NULL UNIQUE,
-    hash TEXT NOT NULL,
-    salt TEXT NOT NULL,
-    time_created TIMESTAMP NOT NULL
-);
-CREATE TABLE sqlite_sequence(name,seq);
-CREATE TABLE Characters (
-    character_id INTEGER PRIMARY KEY,
-    character_name TEXT NOT NULL UNIQUE,
-    character_description TEXT NOT NULL
-);
-CREATE TABLE Enemies (
-    enemy_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    enemy_name TEXT NOT NULL UNIQUE
-);
-CREATE TABLE Subject (
-    subject_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    subject_name TEXT NOT NULL,
-    subject_info TEXT NOT NULL
-);
-CREATE TABLE EnemiesKilled (
-    enemy_killed_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    enemy_id INTEGER NOT NULL,
-    character_id INTEGER NOT NULL,
-    user_id INTEGER NOT NULL,
-    amount INTEGER NOT NULL,
-    FOREIGN KEY(enemy_id) REFERENCES Enemies(enemy_id),
-    FOREIGN KEY(character_id) REFERENCES Characters(character_id),
-    FOREIGN KEY(user_id) REFERENCES User(user_id)
-);
-CREATE TABLE Questions (
-    question_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    topic_id INTEGER NOT NULL,
-    subject_id INTEGER NOT NULL,
-    "question_text" TEXT NOT NULL,
-    correct_answer TEXT NOT NULL,
-    option_1 TEXT NOT NULL,
-    option_2 TEXT NOT NULL,
-    option_3 TEXT NOT NULL,
-    UNIQUE("question_text"),
-    FOREIGN KEY(topic_id) REFERENCES Topic(topic_id),
-    FOREIGN KEY(subject_id) REFERENCES Subject(subject_id)
-);
-CREATE TABLE Topic (
-    topic_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    subject_id INTEGER NOT NULL,
-    "topic_text" TEXT NOT NULL,
-    FOREIGN KEY(subject_id) REFERENCES Subject(subject_id)
-);
-CREATE TABLE IF NOT EXISTS "HighScore" (
-    high_score_id INTEGER PRIMARY KEY AUTOINCREMENT,
-    user_id INTEGER NOT NULL,
-    character_id INTEGER NOT NULL,
-    subject_id INTEGER NOT NULL, topic_id INTEGER NOT NULL REFERENCES Topic(topic_id),
-    high_score INTEGER NOT NULL,
-    FOREIGN KEY(user_id) REFERENCES User(user_id),
-    FOREIGN KEY(character_id) REFERENCES Characters(character_id),
-    FOREIGN KEY(subject_id) REFERENCES Subject(subject_id)
-);
+CREATE TABLE User (
+    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL UNIQUE,
+    hash TEXT NOT NULL,
+    salt TEXT NOT NULL,
+    time_created TIMESTAMP NOT NULL
+);
+CREATE TABLE sqlite_sequence(name,seq);
+CREATE TABLE Characters (
+    character_id INTEGER PRIMARY KEY,
+    character_name TEXT NOT NULL UNIQUE,
+    character_description TEXT NOT NULL
+);
+CREATE TABLE Enemies (
+    enemy_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    enemy_name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE Subject (
+    subject_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    subject_name TEXT NOT NULL,
+    subject_info TEXT NOT NULL
+);
+CREATE TABLE EnemiesKilled (
+    enemy_killed_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    enemy_id INTEGER NOT NULL,
+    character_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    amount INTEGER NOT NULL,
+    FOREIGN KEY(enemy_id) REFERENCES Enemies(enemy_id),
+    FOREIGN KEY(character_id) REFERENCES Characters(character_id),
+    FOREIGN KEY(user_id) REFERENCES User(user_id)
+);
+CREATE TABLE Questions (
+    question_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    topic_id INTEGER NOT NULL,
+    subject_id INTEGER NOT NULL,
+    "question_text" TEXT NOT NULL,
+    correct_answer TEXT NOT NULL,
+    option_1 TEXT NOT NULL,
+    option_2 TEXT NOT NULL,
+    option_3 TEXT NOT NULL,
+    UNIQUE("question_text"),
+    FOREIGN KEY(topic_id) REFERENCES Topic(topic_id),
+    FOREIGN KEY(subject_id) REFERENCES Subject(subject_id)
+);
+CREATE TABLE Topic (
+    topic_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    subject_id INTEGER NOT NULL,
+    "topic_text" TEXT NOT NULL,
+    FOREIGN KEY(subject_id) REFERENCES Subject(subject_id)
+);
+CREATE TABLE IF NOT EXISTS "HighScore" (
+    high_score_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    character_id INTEGER NOT NULL,
+    subject_id INTEGER NOT NULL, topic_id INTEGER NOT NULL REFERENCES Topic(topic_id),
+    high_score INTEGER NOT NULL,
+    FOREIGN KEY(user_id) REFERENCES User(user_id),
+    FOREIGN KEY(character_id) REFERENCES Characters(character_id),
+    FOREIGN KEY(subject_id) REFERENCES Subject(subject_id)
+);
+CREATE UNIQUE INDEX HighScoreKey ON HighScore (user_id, character_id, subject_id, topic_id);
+CREATE VIRTUAL TABLE QuestionSearch USING fts5(
+    question_text, correct_answer, option_1, option_2, option_3,
+    content='Questions', content_rowid='question_id', tokenize='porter unicode61'
+);
+CREATE TRIGGER QuestionSearchInsert AFTER INSERT ON Questions BEGIN
+    INSERT INTO QuestionSearch (rowid, question_text, correct_answer, option_1, option_2, option_3)
+    VALUES (new.question_id, new.question_text, new.correct_answer, new.option_1, new.option_2, new.option_3);
+END;
+CREATE TRIGGER QuestionSearchDelete AFTER DELETE ON Questions BEGIN
+    INSERT INTO QuestionSearch (QuestionSearch, rowid, question_text, correct_answer, option_1, option_2, option_3)
+    VALUES ('delete', old.question_id, old.question_text, old.correct_answer, old.option_1, old.option_2, old.option_3);
+END;
+CREATE TRIGGER QuestionSearchUpdate AFTER UPDATE ON Questions BEGIN
+    INSERT INTO QuestionSearch (QuestionSearch, rowid, question_text, correct_answer, option_1, option_2, option_3)
+    VALUES ('delete', old.question_id, old.question_text, old.correct_answer, old.option_1, old.option_2, old.option_3);
+    INSERT INTO QuestionSearch (rowid, question_text, correct_answer, option_1, option_2, option_3)
+    VALUES (new.question_id, new.question_text, new.correct_answer, new.option_1, new.option_2, new.option_3);
+END;
+CREATE INDEX HighScoreLeaderboard ON HighScore (character_id, subject_id, topic_id, high_score DESC, user_id);
+CREATE TABLE AnswerLog (
+    answer_log_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    user_id INTEGER,
+    question_id INTEGER,
+    chosen_option TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    time_taken REAL NOT NULL,
+    combo INTEGER NOT NULL,
+    answered_at TIMESTAMP NOT NULL,
+    FOREIGN KEY(user_id) REFERENCES User(user_id)
+);
+CREATE UNIQUE INDEX EnemiesKilledKey ON EnemiesKilled (user_id, enemy_id, character_id);
+CREATE TABLE SessionToken (
+    session_token_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    token_hash TEXT NOT NULL UNIQUE,
+    created_at TIMESTAMP NOT NULL,
+    expires_at TIMESTAMP NOT NULL,
+    revoked INTEGER NOT NULL DEFAULT 0,
+    FOREIGN KEY(user_id) REFERENCES User(user_id)
+);
+CREATE TABLE QuestionRating (
+    question_id INTEGER PRIMARY KEY,
+    rating REAL NOT NULL,
+    attempts INTEGER NOT NULL
+);
+CREATE TABLE UserTopicRating (
+    user_id INTEGER NOT NULL,
+    topic_id INTEGER NOT NULL,
+    rating REAL NOT NULL,
+    attempts INTEGER NOT NULL,
+    PRIMARY KEY (user_id, topic_id),
+    FOREIGN KEY(user_id) REFERENCES User(user_id)
+);
+CREATE TABLE ReviewSchedule (
+    user_id INTEGER NOT NULL,
+    question_id INTEGER NOT NULL,
+    repetitions INTEGER NOT NULL,
+    interval REAL NOT NULL,
+    ease REAL NOT NULL,
+    due_at REAL NOT NULL,
+    PRIMARY KEY (user_id, question_id),
+    FOREIGN KEY(user_id) REFERENCES User(user_id)
+);
+CREATE TABLE SeenQuestions (
+    user_id INTEGER PRIMARY KEY,
+    seen BLOB NOT NULL,
+    FOREIGN KEY(user_id) REFERENCES User(user_id)
+);
+CREATE TABLE GameSession (
+    session_id TEXT PRIMARY KEY,
+    user_id INTEGER,
+    seed INTEGER NOT NULL,
+    mode TEXT NOT NULL,
+    character_id INTEGER NOT NULL,
+    subject_id INTEGER NOT NULL,
+    topic_id INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    started_at TIMESTAMP NOT NULL,
+    FOREIGN KEY(user_id) REFERENCES User(user_id)
+);
@@ -0,0 +1,142 @@
+import argparse
+import time
+
+import database
+
+# NumPy is only needed to re-score logged answers in bulk, live scoring never uses it
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class ScoringRules:
+    # Points for a correct answer are (base + speed bonus) * (1 + combo_bonus * combo), the speed bonus falls
+    # linearly to 0 at max_time. A wrong answer costs penalty_share of the same base plus penalty_flat and resets
+    # the combo. The score never drops below 0
+    def __init__(self, base=100, speed_bonus=900, max_time=60, combo_bonus=0.05, penalty_share=0.3, penalty_flat=50):
+        self.base = base
+        self.speed_bonus = speed_bonus
+        self.max_time = max_time
+        self.combo_bonus = combo_bonus
+        self.penalty_share = penalty_share
+        self.penalty_flat = penalty_flat
+
+
+DEFAULT_RULES = ScoringRules()
+
+
+def answer_points(correct, time_taken, combo, rules=DEFAULT_RULES):
+    # combo is the combo after this answer, so the first correct answer in a row already counts 1
+    base_score = rules.base + max(0, (rules.speed_bonus * ((rules.max_time - time_taken) / rules.max_time)))
+    if correct:
+        return int(base_score * (1 + rules.combo_bonus * combo))
+    return -(int(base_score * rules.penalty_share) + rules.penalty_flat)
+
+
+def score_answer(score, combo, correct, time_taken, rules=DEFAULT_RULES):
+    # Returns the new (score, combo)
+    combo = combo + 1 if correct else 0
+    return max(0, score + answer_points(correct, time_taken, combo, rules)), combo
+
+
+def score_session(answers, rules=DEFAULT_RULES):
+    # answers is (correct, time_taken) in the order they were given
+    score, combo = 0, 0
+    for correct, time_taken in answers:
+        score, combo = score_answer(score, combo, correct, time_taken, rules)
+    return score
+
+
+def rescore(session_ids, correct, time_taken, rules=DEFAULT_RULES):
+    # Final score of every session under rules. The three sequences are one entry per answer, grouped by
+    # session and in answer order. Returns (session_ids, scores) with one entry per session
+    if numpy is None:
+        return rescore_scalar(session_ids, correct, time_taken, rules)
+    session_ids = numpy.asarray(session_ids)
+    correct = numpy.asarray(correct, dtype=bool)
+    time_taken = numpy.asarray(time_taken, dtype=numpy.float64)
+    count = len(correct)
+    if count == 0:
+        return session_ids[:0], numpy.zeros(0, dtype=numpy.int64)
+    starts = numpy.ones(count, dtype=bool)
+    starts[1:] = session_ids[1:] != session_ids[:-1]
+    positions = numpy.arange(count)
+    session_numbers = numpy.cumsum(starts) - 1
+    first_positions = positions[starts]
+    # Combo: correct answers since the last wrong answer or the start of the session, including this one
+    resets = numpy.where(starts | ~correct, positions, 0)
+    last_reset = numpy.maximum.accumulate(resets)
+    correct_so_far = numpy.cumsum(correct)
+    combo = correct_so_far - correct_so_far[last_reset] + correct[last_reset]
+    combo[~correct] = 0
+    base_score = rules.base + numpy.maximum(0, rules.speed_bonus * ((rules.max_time - time_taken) / rules.max_time))
+    points = numpy.where(correct, (base_score * (1 + rules.combo_bonus * combo)).astype(numpy.int64),
+                         -((base_score * rules.penalty_share).astype(numpy.int64) + rules.penalty_flat))
+    # With the floor at 0, S_n = P_n - min(0, min(P_1..P_n)) where P is the unclamped running total of the session
+    running = numpy.cumsum(points)
+    running -= numpy.repeat(running[first_positions] - points[first_positions], numpy.diff(numpy.append(first_positions, count)))
+    # Running minimum within each session: earlier sessions are pushed above anything in later ones first
+    spread = int(numpy.abs(running).max()) * 2 + 1
+    shifted = running - session_numbers * spread
+    lowest = numpy.minimum.accumulate(shifted) + session_numbers * spread
+    scores = running - numpy.minimum(0, lowest)
+    last_positions = numpy.append(first_positions[1:], count) - 1
+    return session_ids[first_positions], scores[last_positions]
+
+
+def rescore_scalar(session_ids, correct, time_taken, rules=DEFAULT_RULES):
+    ids, scores = [], []
+    score, combo = 0, 0
+    previous = None
+    for position, session_id in enumerate(session_ids):
+        if position == 0 or session_id != previous:
+            if position:
+                scores.append(score)
+            ids.append(session_id)
+            score, combo = 0, 0
+            previous = session_id
+        score, combo = score_answer(score, combo, correct[position], time_taken[position], rules)
+    if ids:
+        scores.append(score)
+    return ids, scores
+
+
+def load_answer_log(connection, batch_size=100000):
+    # Every logged answer grouped by session, as arrays when NumPy is available
+    session_ids, correct, time_taken = [], [], []
+    cursor = connection.execute('''SELECT session_id, correct, time_taken FROM AnswerLog
+                                   ORDER BY session_id, answer_log_id''')
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        for session_id, was_correct, seconds in rows:
+            session_ids.append(session_id)
+            correct.append(was_correct)
+            time_taken.append(seconds)
+    if numpy is not None:
+        return numpy.array(session_ids), numpy.array(correct, dtype=bool), numpy.array(time_taken, dtype=numpy.float64)
+    return session_ids, correct, time_taken
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-score every logged game under different rules and compare with the current ones.")
+    for name, default in vars(DEFAULT_RULES).items():
+        parser.add_argument("--" + name.replace("_", "-"), type=float, default=default)
+    arguments = parser.parse_args(argv)
+    new_rules = ScoringRules(**vars(arguments))
+    connection = database.connect()
+    history = load_answer_log(connection)
+    connection.close()
+    start = time.perf_counter()
+    _, old_scores = rescore(*history)
+    _, new_scores = rescore(*history, rules=new_rules)
+    elapsed = time.perf_counter() - start
+    print(f"{len(history[0])} answers in {len(old_scores)} games, re-scored twice in {elapsed:.2f}s")
+    if len(old_scores):
+        print(f"mean score {sum(old_scores) / len(old_scores):.1f} -> {sum(new_scores) / len(new_scores):.1f}")
+
+
+if __name__ == "__main__":
+    main()
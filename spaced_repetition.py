@@ -0,0 +1,135 @@
+import heapq
+import time
+
+import database
+
+DAY = 24 * 60 * 60
+# SM-2 defaults, a question that is answered wrong comes back after LAPSE_INTERVAL
+START_EASE = 2.5
+MIN_EASE = 1.3
+FIRST_INTERVAL = 1 * DAY
+SECOND_INTERVAL = 6 * DAY
+LAPSE_INTERVAL = 10 * 60
+# Correct answers quicker than this share of the time limit are graded as perfect recall
+QUICK_ANSWER = 0.25
+
+UPSERT_SQL = '''INSERT INTO ReviewSchedule (user_id, question_id, repetitions, interval, ease, due_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (user_id, question_id) DO UPDATE SET repetitions = excluded.repetitions,
+                    interval = excluded.interval, ease = excluded.ease, due_at = excluded.due_at'''
+
+
+def grade(correct, time_taken, max_time):
+    # SM-2 quality from 0 to 5
+    if not correct:
+        return 1
+    if time_taken <= max_time * QUICK_ANSWER:
+        return 5
+    return 4 if time_taken < max_time else 3
+
+
+class ReviewState:
+    __slots__ = ("repetitions", "interval", "ease", "due_at")
+
+    def __init__(self, repetitions=0, interval=0, ease=START_EASE, due_at=0):
+        self.repetitions = repetitions
+        self.interval = interval
+        self.ease = ease
+        self.due_at = due_at
+
+    def review(self, quality, now):
+        if quality < 3:
+            self.repetitions = 0
+            self.interval = LAPSE_INTERVAL
+        else:
+            self.repetitions += 1
+            if self.repetitions == 1:
+                self.interval = FIRST_INTERVAL
+            elif self.repetitions == 2:
+                self.interval = SECOND_INTERVAL
+            else:
+                self.interval = self.interval * self.ease
+        self.ease = max(MIN_EASE, self.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+        self.due_at = now + self.interval
+
+
+class ReviewScheduler:
+    # Per-user, per-question review intervals. Each (user, topic) gets a min-heap of (due_at, question_id) the
+    # first time it is asked for. Updated questions are pushed again and the old entry is skipped when it comes
+    # up, so an answer costs O(log n). Guests are not scheduled
+    def __init__(self):
+        self.states = {}
+        self.heaps = {}
+        self.changed = set()
+
+    def load_topic(self, connection, user_id, topic_id):
+        cursor = connection.execute('''SELECT ReviewSchedule.question_id, repetitions, interval, ease, due_at
+                                       FROM ReviewSchedule
+                                       JOIN Questions ON Questions.question_id = ReviewSchedule.question_id
+                                       WHERE user_id = ? AND topic_id = ?''', (user_id, topic_id))
+        states = {}
+        for question_id, repetitions, interval, ease, due_at in cursor.fetchall():
+            states[question_id] = ReviewState(repetitions, interval, ease, due_at)
+        heap = [(state.due_at, question_id) for question_id, state in states.items()]
+        heapq.heapify(heap)
+        self.states[(user_id, topic_id)] = states
+        self.heaps[(user_id, topic_id)] = heap
+
+    def ensure_loaded(self, user_id, topic_id, connection=None):
+        if (user_id, topic_id) not in self.states:
+            own_connection = connection is None
+            if own_connection:
+                connection = database.connect()
+            self.load_topic(connection, user_id, topic_id)
+            if own_connection:
+                connection.close()
+
+    def due(self, user_id, topic_id, k, now=None, connection=None):
+        # Up to k question IDs whose review is due, most overdue first
+        if user_id is None:
+            return []
+        now = time.time() if now is None else now
+        self.ensure_loaded(user_id, topic_id, connection)
+        states = self.states[(user_id, topic_id)]
+        heap = self.heaps[(user_id, topic_id)]
+        popped = []
+        while heap and len(popped) < k and heap[0][0] <= now:
+            due_at, question_id = heapq.heappop(heap)
+            state = states.get(question_id)
+            if state is not None and state.due_at == due_at:
+                popped.append((due_at, question_id))
+        for entry in popped:
+            heapq.heappush(heap, entry)
+        return [question_id for _, question_id in popped]
+
+    def record_answer(self, user_id, topic_id, question_id, correct, time_taken, max_time, now=None):
+        if user_id is None or question_id is None:
+            return None
+        now = time.time() if now is None else now
+        self.ensure_loaded(user_id, topic_id)
+        states = self.states[(user_id, topic_id)]
+        heap = self.heaps[(user_id, topic_id)]
+        state = states.get(question_id)
+        if state is None:
+            state = states[question_id] = ReviewState()
+        state.review(grade(correct, time_taken, max_time), now)
+        heapq.heappush(heap, (state.due_at, question_id))
+        if len(heap) > 2 * len(states):
+            # Too many stale entries, rebuild from the live states
+            heap[:] = [(entry.due_at, entry_id) for entry_id, entry in states.items()]
+            heapq.heapify(heap)
+        self.changed.add((user_id, topic_id, question_id))
+        return state.due_at
+
+    def flush(self, writer):
+        if not self.changed:
+            return None
+        rows = []
+        for user_id, topic_id, question_id in self.changed:
+            state = self.states[(user_id, topic_id)][question_id]
+            rows.append((user_id, question_id, state.repetitions, state.interval, state.ease, state.due_at))
+        self.changed = set()
+        return writer.submit_many(UPSERT_SQL, rows)
+
+
+scheduler = ReviewScheduler()
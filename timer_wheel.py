@@ -0,0 +1,182 @@
+import math
+
+# A tick is the wheel's resolution in seconds, each level has 2 ** SLOT_BITS slots and covers that many times
+# the range of the level below, so 4 levels of 64 slots reach about 23 hours at 5 ms. Anything further ahead
+# waits in an overflow list that is looked at once per turn of the top level
+TICK = 0.005
+SLOT_BITS = 6
+SLOTS = 1 << SLOT_BITS
+LEVELS = 4
+
+
+class Timer:
+    __slots__ = ("due", "expires", "callback", "args", "interval", "level", "slot")
+
+    def __init__(self, due, expires, callback, args, interval=None):
+        self.due = due
+        self.expires = expires
+        self.callback = callback
+        self.args = args
+        self.interval = interval
+        self.level = None
+        self.slot = None
+
+
+class TimerWheel:
+    # Hierarchical timing wheel. A timer sits in the lowest level whose higher digits of its expiry tick match the
+    # current tick, in the slot for its digit at that level. When the lower digits of the clock roll over to 0 the
+    # matching slot of the level above is cascaded down, so every timer moves at most once per level and firing
+    # costs O(1). Occupied slots are kept in one bitmask per level, which gives the tick of the next event without
+    # walking empty slots, and advance() only compares against it until something is due
+    def __init__(self, tick=TICK, levels=LEVELS):
+        self.tick = tick
+        self.levels = levels
+        self.now = 0.0
+        self.current = 0
+        self.next_tick = math.inf
+        self.wheels = [[{} for _ in range(SLOTS)] for _ in range(levels)]
+        self.occupied = [0] * levels
+        self.overflow = {}
+        self.firing = ()
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def schedule(self, delay, callback, *args):
+        # Calls callback(*args) on the first advance() at least delay seconds from now
+        return self.add(Timer(self.now + delay, self.expiry(self.now + delay), callback, args))
+
+    def schedule_repeating(self, interval, callback, *args):
+        # Calls callback(*args) every interval seconds. If a frame is late the missed calls are all made on it,
+        # so anything stepped this way moves the same however the frames fall
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        return self.add(Timer(self.now + interval, self.expiry(self.now + interval), callback, args, interval))
+
+    def cancel(self, timer):
+        # A timer taken out of the wheel to fire this tick has level None, clearing its callback is enough
+        if timer is None or timer.callback is None:
+            return None
+        timer.callback = None
+        if timer.level == self.levels:
+            del self.overflow[timer]
+        elif timer.level is not None:
+            slot = self.wheels[timer.level][timer.slot]
+            del slot[timer]
+            if not slot:
+                self.occupied[timer.level] &= ~(1 << timer.slot)
+        if timer.level is not None:
+            timer.level = None
+            self.count -= 1
+
+    def clear(self):
+        # Timers already taken out to fire this tick are cancelled too
+        for timer in self.firing:
+            timer.callback = None
+        for level in self.wheels:
+            for slot in level:
+                for timer in slot:
+                    timer.callback = None
+                    timer.level = None
+        for timer in self.overflow:
+            timer.callback = None
+            timer.level = None
+        self.wheels = [[{} for _ in range(SLOTS)] for _ in range(self.levels)]
+        self.occupied = [0] * self.levels
+        self.overflow = {}
+        self.next_tick = math.inf
+        self.count = 0
+
+    def expiry(self, due):
+        # Never early, and never in a tick that has already been run
+        return max(self.current + 1, math.ceil(due / self.tick - 1e-9))
+
+    def add(self, timer):
+        self.place(timer)
+        self.count += 1
+        # The timer's event is its expiry with the digits below its level cleared
+        shift = SLOT_BITS * timer.level
+        self.next_tick = min(self.next_tick, timer.expires >> shift << shift)
+        return timer
+
+    def place(self, timer):
+        difference = timer.expires ^ self.current
+        level = 0
+        while level < self.levels and difference >> (SLOT_BITS * (level + 1)):
+            level += 1
+        if level == self.levels:
+            self.overflow[timer] = None
+            timer.level = level
+            return None
+        index = (timer.expires >> (SLOT_BITS * level)) & (SLOTS - 1)
+        self.wheels[level][index][timer] = None
+        self.occupied[level] |= 1 << index
+        timer.level = level
+        timer.slot = index
+
+    def advance(self, dt):
+        self.now += dt
+        target = int(self.now / self.tick + 1e-9)
+        if target < self.next_tick:
+            self.current = target
+            return None
+        while self.next_tick <= target:
+            self.current = self.next_tick
+            self.run_tick()
+            self.next_tick = self.find_next()
+        self.current = target
+
+    def run_tick(self):
+        if self.overflow and self.current & ((1 << (SLOT_BITS * self.levels)) - 1) == 0:
+            overflow = self.overflow
+            self.overflow = {}
+            for timer in overflow:
+                self.place(timer)
+        # Highest level first, so a timer cascaded into a level that is also rolling over moves on down
+        for level in range(self.levels - 1, 0, -1):
+            if self.current & ((1 << (SLOT_BITS * level)) - 1) == 0:
+                slot = self.take(level, (self.current >> (SLOT_BITS * level)) & (SLOTS - 1))
+                for timer in slot:
+                    self.place(timer)
+        # Every timer due now leaves the wheel before any callback runs, so a callback can cancel one that is due
+        # in the same tick or clear the wheel
+        self.firing = list(self.take(0, self.current & (SLOTS - 1)))
+        for timer in self.firing:
+            timer.level = None
+        self.count -= len(self.firing)
+        for timer in self.firing:
+            callback = timer.callback
+            if callback is None:
+                # Cancelled by an earlier callback in the same tick
+                continue
+            if timer.interval is None:
+                timer.callback = None
+            else:
+                timer.due += timer.interval
+                timer.expires = self.expiry(timer.due)
+                self.place(timer)
+                self.count += 1
+            callback(*timer.args)
+        self.firing = ()
+
+    def take(self, level, index):
+        slot = self.wheels[level][index]
+        if slot:
+            self.wheels[level][index] = {}
+            self.occupied[level] &= ~(1 << index)
+        return slot
+
+    def find_next(self):
+        # Slots at or before the current digit of a level are always empty, so the lowest occupied slot of the
+        # lowest non-empty level is the next thing to happen
+        for level in range(self.levels):
+            occupied = self.occupied[level]
+            if occupied:
+                index = (occupied & -occupied).bit_length() - 1
+                shift = SLOT_BITS * level
+                return (self.current >> (shift + SLOT_BITS) << (shift + SLOT_BITS)) | (index << shift)
+        if self.overflow:
+            shift = SLOT_BITS * self.levels
+            return ((self.current >> shift) + 1) << shift
+        return math.inf